@@ -36,7 +36,7 @@ CREATE TABLE IF NOT EXISTS Simulacao (
 # Criar tabela Resultado: vincula resultados a uma simulação (id_simulacao)
 cur.execute("""
 CREATE TABLE IF NOT EXISTS Resultado (
-    id_resultado INTEGER PRIMARY KEY,
+    id_resultado INTEGER PRIMARY KEY AUTOINCREMENT,
     id_simulacao INTEGER NOT NULL,
     frente_pareto_json TEXT NOT NULL,
     FOREIGN KEY (id_simulacao) REFERENCES Simulacao(id_simulacao) ON DELETE CASCADE
@@ -15,6 +15,15 @@ from typing import List
 import matplotlib.pyplot as _plt
 import matplotlib.colors as _colors
 
+# Classe de cada byte do map.txt no mini-mapa (0 vazio, 1 parede, 2 porta): a linha inteira é
+# convertida com bytes.translate em vez de comparar caractere a caractere
+_MINIMAP_CLASSES = bytearray(256)
+for _c in b'1|#':
+    _MINIMAP_CLASSES[_c] = 1
+for _c in b'2Pp':
+    _MINIMAP_CLASSES[_c] = 2
+_MINIMAP_CLASSES = bytes(_MINIMAP_CLASSES)
+
 # ================= CONFIGURAÇÃO DA PÁGINA =================
 st.set_page_config(page_title="Resultados", layout="wide")
 
@@ -464,9 +473,8 @@ if selected_name:
                                                 cons_path = _P('simulador_heuristica') / 'output' / (selected_name or '') / 'metrics.json'
                                                 if cons_path.exists():
                                                     try:
-                                                        with open(cons_path, 'r') as cf:
-                                                            cons = json.load(cf)
-                                                        evs = cons.get('evaluations') or []
+                                                        from services.nsga_integration import load_consolidated_evaluations
+                                                        evs = load_consolidated_evaluations(cons_path)
                                                         # prepare solution matching keys
                                                         try:
                                                             sol_num_doors = int(doors_val) if doors_val is not None else int(solution.get('num_doors') or 0)
@@ -564,15 +572,10 @@ if selected_name:
                                         grid_w = len(map_layout[0]) if grid_h>0 else 0
                                         import numpy as _np
                                         arr = _np.zeros((grid_h, grid_w), dtype=int)
-                                        # fill base: 0 empty, 1 wall, 2 door
+                                        # fill base: 0 empty, 1 wall, 2 door (non-ASCII chars count as empty)
                                         for y,row in enumerate(map_layout):
-                                            for x,ch in enumerate(row):
-                                                if ch in ('1','|','#'):
-                                                    arr[y,x] = 1
-                                                elif ch in ('2',) or (isinstance(ch, str) and ch.upper()=='P'):
-                                                    arr[y,x] = 2
-                                                else:
-                                                    arr[y,x] = 0
+                                            codes = ''.join(row).encode('ascii', 'replace').translate(_MINIMAP_CLASSES)
+                                            arr[y, :len(codes)] = _np.frombuffer(codes, dtype=_np.uint8)
                                         # mark selected doors from solution
                                         for p in dp:
                                             try:
@@ -52,6 +52,7 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from services.simulator_integration import SimulatorIntegration, DatabaseIntegration
+from services import json_utils
 from services.map_creation_integration import map_creation_service
 from services.nsga_integration import NSGAIntegration
 
@@ -431,7 +432,7 @@ with col1:
                 }
                 # Save grouped labels (caracterizations)
                 labels_path = tmp_dir / 'individuals_labels.json'
-                labels_path.write_text(json.dumps(unified, indent=2, ensure_ascii=False))
+                labels_path.write_bytes(json_utils.dumps(unified, indent=True))
 
                 # Also generate an expanded individuals.json (list expanded by amount)
                 expanded = []
@@ -450,9 +451,10 @@ with col1:
                             "col": 0
                         })
                 expanded_path = tmp_dir / 'individuals.json'
-                expanded_path.write_text(json.dumps(expanded, indent=2, ensure_ascii=False))
+                expanded_bytes = json_utils.dumps(expanded, indent=True)
+                expanded_path.write_bytes(expanded_bytes)
                 # update textarea to reflect expanded JSON
-                st.session_state.individuals_textarea = expanded_path.read_text()
+                st.session_state.individuals_textarea = expanded_bytes.decode('utf-8')
                 st.success(f"Labels exportados: {labels_path} and {expanded_path}")
             except Exception as e:
                 st.error(f"Falha ao exportar labels: {e}")
@@ -718,8 +720,10 @@ if st.session_state.run_sim:
                 temp_dir.mkdir(exist_ok=True)
 
                 individuals_path = temp_dir / "individuals.json"
-                with open(individuals_path,"w") as f:
-                    json.dump(json.loads(st.session_state.individuals_textarea),f,indent=2)
+                # O texto do editor já é o JSON a gravar: só valida, sem reserializar
+                individuals_text = st.session_state.individuals_textarea
+                json_utils.loads(individuals_text)
+                individuals_path.write_bytes(individuals_text.encode('utf-8'))
 
                 gen = map_creation_service.convert_image_to_maps(str(mapa_path), str(temp_dir / "selected_map"))
                 main_map_path = Path(gen.get("main",""))
@@ -795,6 +799,8 @@ if st.session_state.run_sim:
                     simulation_seed = sim_params.get('simulation_seed', st.session_state.get('simulation_seed', 75))
                     draw_mode = sim_params.get('draw_mode', True)
                     
+                    # Execução interativa única: a CLI grava output/<exp>/simulator.log e devolve o
+                    # final dele em stdout, exibido abaixo (os workers persistentes ficam para o NSGA-II)
                     completed_process = st.session_state.simulator_integration.run_simulator_cli(
                         experiment_name=simulation_name,
                         draw=draw_mode,
@@ -811,6 +817,9 @@ if st.session_state.run_sim:
                     st.success("Simulação executada com sucesso!")
                 else:
                     st.error(f"Simulador retornou código {completed_process.returncode}")
+                    log_path = getattr(completed_process, "log_path", None)
+                    if log_path is not None and log_path.exists():
+                        st.caption(f"Log completo da execução: {log_path}")
 
                 st.session_state.last_results = completed_process
 
@@ -0,0 +1,37 @@
+"""
+Serialização JSON rápida para os serviços de integração.
+
+Usa `orjson` quando disponível e recai para o módulo `json` da biblioteca padrão
+caso contrário. Ambas as funções trabalham com bytes, como o orjson.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    """Desserializa JSON a partir de bytes ou str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _default(obj):
+    """Converte arrays e escalares NumPy para tipos nativos no fallback da biblioteca padrão."""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, indent: bool = False) -> bytes:
+    """Serializa `obj` (inclusive arrays NumPy) para bytes UTF-8, com indentação de 2 espaços se `indent=True`."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    # ensure_ascii=False: caracteres não ASCII saem em UTF-8, como no orjson, e não como \uXXXX
+    return json.dumps(obj, indent=2 if indent else None, default=_default, ensure_ascii=False).encode('utf-8')
@@ -4,88 +4,353 @@ Módulo de integração com NSGA-II.
 Este módulo implementa a integração específica para o algoritmo NSGA-II,
 permitindo a execução de otimização multiobjetivo usando o simulador.
 """
+import hashlib
 import json
+import math
+import multiprocessing
+import os
+import queue
+import re
+import shutil
 import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional
 import numpy as np
-import streamlit as st
 from .logger import default_log as logger
+from . import json_utils
 
-# Adiciona o caminho do simulador ao sys.path para importar módulos
+# Caminhos do simulador, adicionados ao sys.path apenas no primeiro uso (ver _ensure_imports)
 # Usa caminho absoluto baseado na raiz do projeto (duas pastas acima de `services`)
 project_root = Path(__file__).resolve().parents[2]
 simulador_path = project_root / "simulador_heuristica"
 unified_path = simulador_path / "unified"
 simulator_path = simulador_path / "simulator"
 
-# Adiciona os caminhos necessários ao sys.path
-if str(simulador_path) not in sys.path:
-    sys.path.append(str(simulador_path))
-if str(unified_path) not in sys.path:
-    sys.path.append(str(unified_path))
-if str(simulator_path) not in sys.path:
-    sys.path.append(str(simulator_path))
+# Diretório em RAM (tmpfs) para os arquivos temporários de cada avaliação, quando disponível.
+# Em plataformas sem /dev/shm, tempfile usa o diretório temporário padrão do sistema.
+_TMPFS_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
 
-print("DEBUG: Tentando importar módulos NSGA-II...")
-print(f"DEBUG: simulador_path: {simulador_path}")
-print(f"DEBUG: unified_path: {unified_path}")
-print(f"DEBUG: sys.path entries: {[p for p in sys.path if 'simulador' in p]}")
+# Valor numérico impresso após um token de distância (ex.: 'qtd distancia 589.47', 'distância: 0,5')
+_DIST_RE = re.compile(r'dist\w*[^0-9\-\n]*(-?\d+(?:[.,]\d+)?(?:[eE][-+]?\d+)?)', re.IGNORECASE)
 
+# Chaves de distância aceitas em resultados/metrics.json, em ordem de preferência
+_DISTANCE_KEYS = ('distance', 'avg_distance', 'qtdDistance', 'qtd_distancia', 'qtd_distance',
+                  'distancia', 'total_distance', 'distancia_total')
+_DISTANCE_RANK = {key: rank for rank, key in enumerate(_DISTANCE_KEYS)}
+
+
+def _distance_key(data) -> Optional[str]:
+    """Chave de distância de maior preferência presente em `data` (None se não houver).
+
+    Uma única passada pelas chaves de `data`, com uma consulta ao dicionário por chave.
+    """
+    if not isinstance(data, dict):
+        return None
+    best = None
+    for key in data:
+        rank = _DISTANCE_RANK.get(key)
+        if rank is not None and (best is None or rank < best):
+            best = rank
+    return _DISTANCE_KEYS[best] if best is not None else None
+
+# numba é opcional: sem ele, as funções decoradas com njit rodam como Python puro
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def _match_iterations(r_num, r_dist, e_num, e_dist, e_iter):
+    """
+    Associa cada solução salva a uma avaliação compatível e retorna suas iterações.
+
+    Uma avaliação é compatível quando tem o mesmo número de portas e, se ambas as distâncias
+    são conhecidas, distância igual dentro de 0,1% (a mais próxima é escolhida). Valores
+    ausentes são -1 (inteiros) ou NaN (distâncias); o retorno é -1 quando não há avaliação
+    compatível ou ela não tem iterações.
+    """
+    # Avaliações ordenadas por (portas, distância), com as distâncias NaN no fim de cada grupo:
+    # cada solução busca seu grupo e a distância por bisseção em vez de percorrer todas
+    order = np.argsort(e_dist, kind='mergesort')
+    order = order[np.argsort(e_num[order], kind='mergesort')]
+    nums = e_num[order]
+    dists = e_dist[order]
+    iters = e_iter[order]
+    n_finite = np.isfinite(dists)
+
+    matched = np.full(r_num.shape[0], -1, dtype=np.int64)
+    for i in range(r_num.shape[0]):
+        if r_num[i] < 0:
+            continue
+        lo = np.searchsorted(nums, r_num[i], side='left')
+        hi = np.searchsorted(nums, r_num[i], side='right')
+        if lo == hi:
+            continue
+        # fim das distâncias conhecidas no grupo
+        fin = lo + np.searchsorted(~n_finite[lo:hi], True, side='left')
+        if np.isnan(r_dist[i]):
+            matched[i] = iters[lo]
+            continue
+        best = -1
+        if fin > lo:
+            k = lo + np.searchsorted(dists[lo:fin], r_dist[i])
+            tol = max(1e-6, 0.001 * abs(r_dist[i]))
+            best_gap = tol
+            for c in (k - 1, k):
+                if lo <= c < fin and abs(dists[c] - r_dist[i]) <= best_gap:
+                    best_gap = abs(dists[c] - r_dist[i])
+                    best = c
+        if best < 0 and fin < hi:
+            # avaliação sem distância conhecida: aceita pelo número de portas
+            best = fin
+        if best >= 0:
+            matched[i] = iters[best]
+    return matched
+
+
+def _tmp_path_for(path: Path) -> Path:
+    """Temporário ao lado de `path`, único por processo e thread (gravações concorrentes não colidem)."""
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Escreve `data` em `path` de forma atômica: arquivo temporário, fsync e rename."""
+    tmp_path = _tmp_path_for(path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Após o rename não sobra temporário; só é preciso limpá-lo quando a gravação falha
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+# A partir de quantos metrics.json a agregação em save_results usa um pool de processos
+_PARALLEL_METRICS_MIN = 256
+
+
+# Campos agregados de um metrics.json e as chaves aceitas para cada um, em ordem de preferência
+_METRIC_FIELD_KEYS = (
+    ('distance', ('distancia_total', 'total_distance', 'distance', 'qtdDistance')),
+    ('iterations', ('iterations', 'tempo_total', 'total_time', 'qtd_iteracoes', 'iters')),
+    ('num_doors', ('num_doors', 'qtd_doors')),
+)
+_METRIC_DISPATCH = {
+    key: (field, rank) for field, keys in _METRIC_FIELD_KEYS for rank, key in enumerate(keys)
+}
+
+
+def _pick_metric_fields(data: Dict) -> Dict[str, Any]:
+    """
+    Extrai os campos agregados de `data` numa única passada pelas suas chaves.
+
+    Equivale a `data.get(k1) or data.get(k2) or ...` para cada campo: vale o primeiro valor
+    verdadeiro na ordem de preferência e, se nenhum for, o valor da última chave.
+    """
+    picked = {}
+    for key, value in data.items():
+        target = _METRIC_DISPATCH.get(key)
+        if target is None or not value:
+            continue
+        field, rank = target
+        if field not in picked or rank < picked[field][0]:
+            picked[field] = (rank, value)
+    return {
+        field: picked[field][1] if field in picked else data.get(keys[-1])
+        for field, keys in _METRIC_FIELD_KEYS
+    }
+
+
+def _load_metric(metrics_file: Path):
+    """
+    Lê um metrics.json de avaliação e extrai os campos usados na agregação.
+
+    Returns:
+        Tupla (nome da avaliação, caminho, distância, número de portas, iterações),
+        ou None se o arquivo não puder ser lido
+    """
+    try:
+        fields = _pick_metric_fields(json_utils.loads(metrics_file.read_bytes()))
+        d = fields['distance']
+        it = fields['iterations']
+        nd = fields['num_doors'] or None
+        return (
+            metrics_file.parent.name,
+            str(metrics_file),
+            float(d) if d is not None else None,
+            int(nd) if nd is not None else None,
+            int(it) if it is not None else None
+        )
+    except Exception:
+        return None
+
+
+def load_consolidated_evaluations(consolidated_path: Path) -> List[Dict]:
+    """
+    Lê as avaliações de um metrics.json consolidado por NSGAIntegration.save_results.
+
+    Args:
+        consolidated_path: Caminho de output/<simulação>/metrics.json
+
+    Returns:
+        Lista de avaliações, lidas do próprio JSON ou do arquivo Parquet indicado nele
+    """
+    data = json_utils.loads(Path(consolidated_path).read_bytes())
+    if 'evaluations' in data:
+        return data['evaluations'] or []
+    if data.get('parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_table(Path(consolidated_path).parent / data['parquet']).to_pylist()
+    return []
+
+
+# Apenas as classes base Problem e DuplicateElimination são necessárias na importação;
+# o algoritmo e os operadores do pymoo são carregados sob demanda por _ensure_imports().
 try:
-    print("DEBUG: Importando pymoo...")
-    from pymoo.algorithms.moo.nsga2 import NSGA2
     from pymoo.core.problem import Problem
-    from pymoo.optimize import minimize
-    from pymoo.operators.sampling.rnd import BinaryRandomSampling
-    from pymoo.operators.crossover.hux import HalfUniformCrossover
-    from pymoo.operators.mutation.bitflip import BitflipMutation
-    print("DEBUG: Módulos pymoo importados com sucesso")
-    print("DEBUG: NSGA2 =", NSGA2)
-    print("DEBUG: Problem =", Problem)
-    print("DEBUG: minimize =", minimize)
-    st.success("Módulos pymoo importados com sucesso")
-except ImportError as e:
-    print(f"DEBUG: Erro ao importar módulos do pymoo: {e}")
-    import traceback
-    print(f"DEBUG: Traceback completo: {traceback.format_exc()}")
-    st.error(f"Erro ao importar módulos do pymoo: {e}")
-    # Fallback para quando os módulos não estão disponíveis
-    NSGA2 = None
-    Problem = None
-    minimize = None
-    BinaryRandomSampling = None
-    HalfUniformCrossover = None
-    BitflipMutation = None
-except Exception as e:
-    print(f"DEBUG: Erro inesperado ao importar módulos: {e}")
-    import traceback
-    print(f"DEBUG: Traceback completo: {traceback.format_exc()}")
-    st.error(f"Erro inesperado ao importar módulos: {e}")
-    # Fallback para quando os módulos não estão disponíveis
-    NSGA2 = None
+    from pymoo.core.duplicate import DuplicateElimination
+except Exception:
     Problem = None
-    minimize = None
-    BinaryRandomSampling = None
-    HalfUniformCrossover = None
-    BitflipMutation = None
+    DuplicateElimination = object
+
+NSGA2 = None
+minimize = None
+BinaryRandomSampling = None
+HalfUniformCrossover = None
+BitflipMutation = None
+DefaultMultiObjectiveTermination = None
+
+
+_PATHS_INSTALLED = False
+
+
+def _install_simulator_paths() -> None:
+    """Adiciona os caminhos do simulador ao sys.path uma única vez por processo."""
+    global _PATHS_INSTALLED
+    if _PATHS_INSTALLED:
+        return
+    known = set(sys.path)
+    for path in (simulador_path, unified_path, simulator_path):
+        if str(path) not in known:
+            sys.path.append(str(path))
+    _PATHS_INSTALLED = True
+
+
+def _ensure_imports() -> bool:
+    """
+    Configura o sys.path do simulador e importa os módulos NSGA-II do pymoo no primeiro uso.
+
+    Returns:
+        True se os módulos do pymoo estão disponíveis, False caso contrário
+    """
+    global NSGA2, minimize, BinaryRandomSampling, HalfUniformCrossover, BitflipMutation
+    global DefaultMultiObjectiveTermination
+    if NSGA2 is not None:
+        return True
+
+    _install_simulator_paths()
+
+    logger.debug("Tentando importar módulos NSGA-II (simulador_path=%s, unified_path=%s)", simulador_path, unified_path)
+
+    try:
+        from pymoo.algorithms.moo.nsga2 import NSGA2 as _NSGA2
+        from pymoo.optimize import minimize as _minimize
+        from pymoo.operators.sampling.rnd import BinaryRandomSampling as _BinaryRandomSampling
+        from pymoo.operators.crossover.hux import HalfUniformCrossover as _HalfUniformCrossover
+        from pymoo.operators.mutation.bitflip import BitflipMutation as _BitflipMutation
+        from pymoo.termination.default import DefaultMultiObjectiveTermination as _DefaultMultiObjectiveTermination
+    except Exception as e:
+        logger.error("Erro ao importar módulos do pymoo: %s", e, exc_info=True)
+        return False
+
+    NSGA2 = _NSGA2
+    minimize = _minimize
+    BinaryRandomSampling = _BinaryRandomSampling
+    HalfUniformCrossover = _HalfUniformCrossover
+    BitflipMutation = _BitflipMutation
+    DefaultMultiObjectiveTermination = _DefaultMultiObjectiveTermination
+    logger.info("Módulos pymoo importados com sucesso")
+    return True
+
+# SimulatorIntegration reconstruído em cada processo que desserializa um EvacuationProblem,
+# indexado pelo base_path do simulador (ver EvacuationProblem.__setstate__)
+_worker_simulators: Dict[str, Any] = {}
+
+
+def _get_worker_simulator_singleton(base_path: str):
+    """Retorna o SimulatorIntegration do processo atual para `base_path`, criando-o no primeiro uso."""
+    sim = _worker_simulators.get(base_path)
+    if sim is None:
+        from .simulator_integration import SimulatorIntegration
+        sim = SimulatorIntegration(base_path=base_path)
+        _worker_simulators[base_path] = sim
+    return sim
+
 
 # Define uma classe base Problem se a importação falhou
 if Problem is None:
     class Problem:
         """Classe base para Problem quando os módulos não estão disponíveis."""
-        def __init__(self, n_var, n_obj, n_constr=0, xl=0, xu=1, type_var=bool):
+        def __init__(self, n_var, n_obj, n_constr=0, xl=0, xu=1, vtype=bool):
             self.n_var = n_var
             self.n_obj = n_obj
             self.n_constr = n_constr
             self.xl = xl
             self.xu = xu
-            self.type_var = type_var
+            self.vtype = vtype
         
         def _evaluate(self, x, out, *args, **kwargs):
             raise NotImplementedError
 
 
+# Quantos problemas (assinaturas) o cache de avaliações em disco guarda; os mais antigos saem primeiro
+_EVAL_CACHE_MAX_PROBLEMS = 8
+
+
+def _gene_key(gene) -> bytes:
+    """Chave compacta de um gene binário: os bits empacotados em bytes."""
+    return np.packbits(np.asarray(gene, dtype=bool)).tobytes()
+
+
+class PackedBitDuplicateElimination(DuplicateElimination):
+    """
+    Eliminação de duplicatas por hash dos genes empacotados em bits.
+
+    Substitui a comparação par a par (matriz de distâncias) do pymoo por um conjunto de
+    chaves, usando a mesma chave do cache de avaliações (ver _gene_key).
+    """
+
+    def _do(self, pop, other, is_duplicate):
+        seen = set()
+        if other is not None and len(other) > 0:
+            packed = np.packbits(np.asarray(other.get("X"), dtype=bool), axis=1)
+            seen.update(row.tobytes() for row in packed)
+        packed = np.packbits(np.asarray(pop.get("X"), dtype=bool), axis=1)
+        for i, row in enumerate(packed):
+            key = row.tobytes()
+            if key in seen:
+                is_duplicate[i] = True
+            elif other is None:
+                # comparando a população com ela mesma: a primeira ocorrência é mantida
+                seen.add(key)
+        return is_duplicate
+
+
 class EvacuationProblem(Problem):
     """
     Problema de evacuação para pymoo NSGA-II.
@@ -94,7 +359,7 @@ class EvacuationProblem(Problem):
     adaptando o problema de evacuação para otimização multiobjetivo.
     """
     
-    def __init__(self, simulator_integration, map_template: str, individuals_template: Dict, door_positions: List[tuple], simulation_params: Dict = None):
+    def __init__(self, simulator_integration, map_template: str, individuals_template: Dict, door_positions: List[tuple], simulation_params: Dict = None, runner: Optional[Callable] = None, cache_size: int = 256):
         """
         Inicializa o problema de evacuação.
         
@@ -104,6 +369,8 @@ class EvacuationProblem(Problem):
             individuals_template: Template dos indivíduos base
             door_positions: Lista de posições possíveis para portas
             simulation_params: Parâmetros de simulação (opcional)
+            runner: Função map(func, iterable) usada para avaliar os indivíduos em paralelo (opcional)
+            cache_size: Número máximo de genes com objetivos memorizados (LRU)
         """
         self.simulator_integration = simulator_integration
         self.map_template = map_template
@@ -111,12 +378,131 @@ class EvacuationProblem(Problem):
         self.door_positions = door_positions
         self.simulation_params = simulation_params or {}
         self.evaluation_count = 0
+        # Avaliações concorrentes (runner) reservam o nome do experimento sob este lock
+        self.runner = runner
+        self._count_lock = threading.Lock()
+        # O template de indivíduos é o mesmo para todas as avaliações: um único individuals.json
+        # compartilhado substitui a escrita por avaliação. O nome inclui o processo e a instância,
+        # pois remove_individuals_file o apaga ao fim da otimização sem afetar outros problemas
+        self._individuals_bytes = json_utils.dumps(self.individuals_template, indent=True)
+        digest = hashlib.sha1(self._individuals_bytes).hexdigest()[:16]
+        self._individuals_file = Path(_TMPFS_DIR or tempfile.gettempdir()) / (
+            f"nsga_individuals_{os.getpid()}_{id(self):x}_{digest}.json"
+        )
+        # Template como vetor de bytes com todas as portas desativadas ('2' -> '0') de uma vez,
+        # mais o deslocamento e o tamanho de cada linha para endereçar as células (x, y)
+        grid = np.frombuffer(self.map_template.encode('ascii'), dtype=np.uint8).copy()
+        grid[grid == ord('2')] = ord('0')
+        newlines = np.flatnonzero(grid == ord('\n'))
+        self._template_grid = grid
+        self._row_starts = np.concatenate(([0], newlines + 1))
+        self._row_lengths = np.concatenate((newlines, [grid.size])) - self._row_starts
+        # Posição no vetor do mapa de cada porta candidata (-1 se fora do mapa): o mapeamento
+        # índice do gene -> célula é fixo durante toda a otimização
+        self._door_offsets = self._cell_offsets(self.door_positions)
+        # Objetivos já simulados (num_doors, distância, iterações), indexados pelo gene empacotado
+        # em bits (LRU). Genes de elite reaparecem entre gerações e não precisam ser simulados de novo.
+        self._eval_cache = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        # Identifica o problema (mapa, indivíduos, portas e parâmetros) no cache persistido em disco
+        self._cache_signature = hashlib.sha1(
+            repr((self.map_template, self._individuals_bytes, list(self.door_positions),
+                  sorted(self.simulation_params.items()))).encode()
+        ).hexdigest()
     # Define um problema com 2 objetivos e n variáveis binárias (uma para cada posição de porta)
     # Objetivos (legacy adjusted): [num_doors, distance]
         # initialize base Problem now that self.door_positions is set
         n_var = len(self.door_positions)
-        super().__init__(n_var=n_var, n_obj=2, n_constr=0, xl=0, xu=1, type_var=bool)
+        super().__init__(n_var=n_var, n_obj=2, n_constr=0, xl=0, xu=1, vtype=bool)
+
+    def __getstate__(self):
+        """Estado serializado sem o handle do simulador (e seu pool de workers), que não precisa viajar."""
+        state = self.__dict__.copy()
+        # O runner (pool de threads) e o lock pertencem ao processo que criou o problema
+        state.pop('runner', None)
+        state.pop('_count_lock', None)
+        state.pop('_cache_lock', None)
+        sim = state.pop('simulator_integration', None)
+        base_path = getattr(sim, 'base_path', None)
+        state['_simulator_base_path'] = str(base_path) if base_path is not None else None
+        return state
+
+    def __setstate__(self, state):
+        """Restaura o estado e religa o simulador ao singleton do processo atual."""
+        base_path = state.pop('_simulator_base_path', None)
+        self.__dict__.update(state)
+        self.runner = None
+        self._count_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self.simulator_integration = (
+            _get_worker_simulator_singleton(base_path) if base_path is not None else None
+        )
     
+    def _ensure_individuals_file(self) -> Path:
+        """Garante que o individuals.json compartilhado existe e retorna seu caminho."""
+        if not self._individuals_file.exists():
+            tmp = _tmp_path_for(self._individuals_file)
+            tmp.write_bytes(self._individuals_bytes)
+            tmp.replace(self._individuals_file)
+        return self._individuals_file
+
+    def remove_individuals_file(self) -> None:
+        """Apaga o individuals.json compartilhado (em tmpfs, ocupa RAM); é recriado se necessário."""
+        self._individuals_file.unlink(missing_ok=True)
+
+    def load_eval_cache(self, cache_file: Path) -> int:
+        """
+        Carrega do disco os objetivos memorizados para este mesmo problema.
+
+        Args:
+            cache_file: Arquivo JSON com os caches de execuções anteriores
+
+        Returns:
+            Número de genes carregados
+        """
+        try:
+            entries = json_utils.loads(cache_file.read_bytes()).get(self._cache_signature, [])
+            # [gene em hex, [num_doors, distância, iterações]]; valores inválidos descartam o arquivo
+            loaded = [
+                (bytes.fromhex(key), (float(nd), float(dist), int(it) if it is not None else None))
+                for key, (nd, dist, it) in entries[-self._cache_size:]
+            ]
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.warning("Falha ao carregar cache de avaliações %s: %s", cache_file, e)
+            return 0
+        with self._cache_lock:
+            self._eval_cache.update(loaded)
+        return len(self._eval_cache)
+
+    def save_eval_cache(self, cache_file: Path) -> None:
+        """Persiste os objetivos memorizados, preservando os caches dos problemas mais recentes.
+
+        O arquivo guarda no máximo _EVAL_CACHE_MAX_PROBLEMS problemas, cada um com até
+        cache_size genes.
+        """
+        try:
+            caches = json_utils.loads(cache_file.read_bytes())
+            if not isinstance(caches, dict):
+                caches = {}
+        except Exception:
+            caches = {}
+        # Reinsere este problema no fim: a ordem do arquivo é a do uso mais recente
+        caches.pop(self._cache_signature, None)
+        with self._cache_lock:
+            caches[self._cache_signature] = [
+                [key.hex(), list(objectives)] for key, objectives in self._eval_cache.items()
+            ]
+        for stale in list(caches)[:-_EVAL_CACHE_MAX_PROBLEMS]:
+            del caches[stale]
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write_bytes(cache_file, json_utils.dumps(caches))
+        except Exception as e:
+            logger.warning("Falha ao salvar cache de avaliações %s: %s", cache_file, e)
+
     def _evaluate(self, x, out, *args, **kwargs):
         """
         Avalia uma população de soluções.
@@ -125,23 +511,44 @@ class EvacuationProblem(Problem):
             x: Matriz de soluções (pop_size x n_var)
             out: Dicionário de saída onde 'F' contém os objetivos
         """
-        # Evaluate each individual and ensure returned array is numeric and finite.
-        raw = np.apply_along_axis(self._evaluate_single, 1, x)
+        # BinaryRandomSampling already yields bool genes; coerce once here (no-op for bool input)
+        # so _decode_gene never converts bit by bit
+        x = np.asarray(x, dtype=bool)
+
+        # Evaluate each individual (concurrently when a runner is set) and ensure returned
+        # array is numeric and finite.
+        if self.runner is not None:
+            raw = self.runner(self._evaluate_single, list(x))
+        else:
+            raw = [self._evaluate_single(gene) for gene in x]
+
+        out["F"] = self._objectives_matrix(raw, len(x))
 
+    def _objectives_matrix(self, raw, n: int) -> np.ndarray:
+        """
+        Converte os objetivos brutos de `n` avaliações em uma matriz (n x 2) numérica e finita.
+
+        Args:
+            raw: Sequência com a saída de _evaluate_single para cada indivíduo
+            n: Número de indivíduos avaliados
+
+        Returns:
+            Matriz float com [num_doors, distance] por linha
+        """
         try:
             results = np.asarray(raw, dtype=float)
         except Exception:
             logger.exception("Failed to convert evaluation results to array")
             # do not invent values; fail safe by assigning large penalty but log as ERROR
-            results = np.full((len(x), 2), 1e6, dtype=float)
+            results = np.full((n, 2), 1e6, dtype=float)
 
         # Normalize shape to (pop_size, 2)
         if results.ndim == 1 and results.size == 2:
-            results = np.tile(results, (len(x), 1))
+            results = np.tile(results, (n, 1))
         elif results.ndim == 1 and results.size != 2:
             # Unexpected shape, set penalties
             logger.debug(f"Unexpected evaluation shape {results.shape}, applying penalties")
-            results = np.full((len(x), 2), 1e6, dtype=float)
+            results = np.full((n, 2), 1e6, dtype=float)
         elif results.ndim == 2 and results.shape[1] != 2:
             # If more/less objectives returned, try to truncate or pad
             logger.debug(f"Evaluation returned {results.shape[1]} objectives per individual; adjusting to 2")
@@ -159,12 +566,10 @@ class EvacuationProblem(Problem):
             results[nonfinite_mask] = 1e6
 
         # Ensure slight difference between objectives to avoid degenerate equal objectives
-        for i in range(results.shape[0]):
-            for a in range(results.shape[1]-1):
-                if results[i, a] == results[i, a+1]:
-                    results[i, a+1] = results[i, a+1] + 1e-6
+        eq = results[:, :-1] == results[:, 1:]
+        results[:, 1:][eq] += 1e-6
 
-        out["F"] = results
+        return results
     
      
     def _evaluate_single(self, gene):
@@ -177,26 +582,35 @@ class EvacuationProblem(Problem):
             Returns:
             Lista com os valores dos 3 objetivos na ordem [num_doors, iterations, distance]
         """
-        # Decode gene and prepare experiment directory and files
-        door_positions = self._decode_gene(gene)
+        # Gene já simulado: reutiliza os objetivos memorizados
+        cache_key = _gene_key(gene)
+        with self._cache_lock:
+            cached = self._eval_cache.get(cache_key)
+            if cached is not None:
+                self._eval_cache.move_to_end(cache_key)
+        if cached is not None:
+            self._record_cached_evaluation(cached)
+            return list(cached[:2])
 
-        experiment_name = f"nsga_eval_{self.evaluation_count}"
-        self.evaluation_count += 1
+        # Decode gene (indices of the active doors) and prepare experiment directory and files
+        selected = self._selected_doors(gene)
 
-        map_content = self._generate_map_with_doors(door_positions)
+        with self._count_lock:
+            experiment_name = f"nsga_eval_{self.evaluation_count}"
+            self.evaluation_count += 1
 
-        temp_dir = Path("temp_nsga") / experiment_name
-        temp_dir.mkdir(parents=True, exist_ok=True)
+        map_content = self._render_map(self._door_offsets[selected])
+
+        # Arquivos de staging ficam em tmpfs: são lidos uma única vez ao copiar para o input do simulador
+        temp_dir = Path(tempfile.mkdtemp(prefix=f"{experiment_name}_", dir=_TMPFS_DIR))
 
         map_file = temp_dir / "map.txt"
-        individuals_file = temp_dir / "individuals.json"
 
         try:
             with open(map_file, 'w') as f:
                 f.write(map_content)
 
-            with open(individuals_file, 'w') as f:
-                json.dump(self.individuals_template, f, indent=2)
+            individuals_file = self._ensure_individuals_file()
 
             # Prepare experiment using the integration helper (copies files to simulator input)
             self.simulator_integration.prepare_experiment_from_uploads(
@@ -207,8 +621,8 @@ class EvacuationProblem(Problem):
             simulation_seed = self.simulation_params.get('simulation_seed')
             draw_mode = self.simulation_params.get('draw_mode', False)
 
-            # Execute simulator CLI and capture output for debugging
-            proc = self.simulator_integration.run_simulator_cli(
+            # Execute simulator (persistent worker when available, CLI otherwise)
+            proc = self.simulator_integration.run_simulator(
                 experiment_name,
                 draw=draw_mode,
                 scenario_seed=scenario_seed,
@@ -239,7 +653,7 @@ class EvacuationProblem(Problem):
                 return [1e6, 1e6]
 
             # Determine first objective (num_doors) from selected door positions
-            num_doors = len(door_positions)
+            num_doors = len(selected)
 
             # Extract numeric objective distance (and optionally num_doors) from results
             obj = self._extract_objectives(results, stdout=stdout, stderr=stderr, num_doors=num_doors)
@@ -259,8 +673,19 @@ class EvacuationProblem(Problem):
                 logger.warning("Missing or non-finite distance for %s, applying penalty", experiment_name)
                 distance_val = 1e6
 
+            # Penalidades não são memorizadas: a falha pode ser transitória. As iterações vão
+            # junto para que acertos do cache possam ser registrados como avaliações completas
+            objectives = [float(num_doors_val), float(distance_val)]
+            if distance_val != 1e6:
+                metric = _load_metric(Path(self.simulator_integration.output_path) / experiment_name / 'metrics.json')
+                iterations = metric[4] if metric is not None else None
+                with self._cache_lock:
+                    self._eval_cache[cache_key] = (*objectives, iterations)
+                    if len(self._eval_cache) > self._cache_size:
+                        self._eval_cache.popitem(last=False)
+
             # Return objectives as floats: [num_doors, distance]
-            return [float(num_doors_val), float(distance_val)]
+            return objectives
 
         except Exception as e:
             logger.exception("Exception during evaluation of experiment %s", experiment_name)
@@ -268,14 +693,33 @@ class EvacuationProblem(Problem):
 
         finally:
             # Clean up temporary staging directory
-            import shutil
-            try:
-                if temp_dir.exists():
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-            except Exception as e:
-                print(f"DEBUG: Failed to remove temp_dir {temp_dir}: {e}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
     
+    def _record_cached_evaluation(self, cached: tuple) -> None:
+        """
+        Registra um acerto do cache como uma avaliação nsga_eval_<n>, com metrics.json e linha no
+        índice, para que save_results associe as iterações também às soluções não simuladas.
+        """
+        with self._count_lock:
+            experiment_name = f"nsga_eval_{self.evaluation_count}"
+            self.evaluation_count += 1
+        num_doors, distance, iterations = cached
+        try:
+            self.simulator_integration.record_metrics(experiment_name, {
+                'distancia_total': distance,
+                'num_doors': int(num_doors),
+                'iterations': iterations,
+                'cached': True
+            })
+        except Exception as e:
+            logger.warning("Falha ao registrar avaliação em cache %s: %s", experiment_name, e)
+
+    def _selected_doors(self, gene: Any) -> np.ndarray:
+        """Índices das portas ativas no gene (genes maiores que n_var são truncados)."""
+        # asarray não copia quando o gene já é bool, como os produzidos pelo pymoo
+        return np.flatnonzero(np.asarray(gene, dtype=bool)[:len(self.door_positions)])
+
     def _decode_gene(self, gene: Any) -> List[tuple]:
         """
         Decodifica um gene binário para posições de portas.
@@ -286,12 +730,33 @@ class EvacuationProblem(Problem):
         Returns:
             Lista de tuplas (x, y) com posições das portas
         """
-        # Converte gene binário para posições de portas
-        door_positions = []
-        for i, bit in enumerate(gene):
-            if bit == 1 and i < len(self.door_positions):
-                door_positions.append(self.door_positions[i])
-        return door_positions
+        return [self.door_positions[i] for i in self._selected_doors(gene)]
+
+    def _cell_offsets(self, door_positions: List[tuple]) -> np.ndarray:
+        """
+        Converte posições (x, y) em índices no vetor de bytes do mapa.
+
+        Args:
+            door_positions: Lista de posições (x, y)
+
+        Returns:
+            Array de índices, com -1 para posições fora do mapa
+        """
+        offsets = np.full(len(door_positions), -1, dtype=np.intp)
+        if len(door_positions):
+            xs, ys = np.asarray(door_positions, dtype=np.intp).reshape(-1, 2).T
+            inside = (ys >= 0) & (ys < self._row_starts.size) & (xs >= 0)
+            inside[inside] = xs[inside] < self._row_lengths[ys[inside]]
+            offsets[inside] = self._row_starts[ys[inside]] + xs[inside]
+        return offsets
+
+    def _render_map(self, offsets: np.ndarray) -> str:
+        """Gera o mapa a partir do template, ativando as portas nos índices dados (-1 é ignorado)."""
+        # Parte do template com as portas existentes já desativadas (pré-computado em __init__)
+        grid = self._template_grid.copy()
+        # 2 representa porta ativa no formato do simulador
+        grid[offsets[offsets >= 0]] = ord('2')
+        return grid.tobytes().decode('ascii')
     
     def _generate_map_with_doors(self, door_positions: List[tuple]) -> str:
         """
@@ -303,20 +768,7 @@ class EvacuationProblem(Problem):
         Returns:
             Conteúdo do mapa como string
         """
-        lines = self.map_template.split('\n')
-        
-        # Primeiro, desativa todas as portas existentes (converte '2' para '0')
-        for y, line in enumerate(lines):
-            lines[y] = line.replace('2', '0')
-        
-        # Depois, ativa apenas as portas selecionadas (converte '0' para '2' nas posições escolhidas)
-        for x, y in door_positions:
-            if 0 <= y < len(lines) and 0 <= x < len(lines[y]):
-                line = list(lines[y])
-                line[x] = '2'  # 2 representa porta ativa no formato do simulador
-                lines[y] = ''.join(line)
-        
-        return '\n'.join(lines)
+        return self._render_map(self._cell_offsets(door_positions))
     
     def _extract_objectives(self, results: Dict, stdout: Optional[str] = None, stderr: Optional[str] = None, num_doors: Optional[int] = None) -> List[Optional[float]]:
         """
@@ -334,8 +786,7 @@ class EvacuationProblem(Problem):
             # Fast path: results already contain metrics
             if isinstance(results, dict):
                 # If explicit metrics already present as top-level numeric keys, prefer distance keys
-                distance_keys = ['distance', 'avg_distance', 'qtdDistance', 'qtd_distancia', 'qtd_distance', 'distancia', 'total_distance', 'distancia_total']
-                d_key = next((k for k in distance_keys if k in results), None)
+                d_key = _distance_key(results)
                 d_val = None
                 if d_key:
                     try:
@@ -348,26 +799,29 @@ class EvacuationProblem(Problem):
 
                 # If a metrics file list is provided, try to open the first JSON containing keys
                 metrics_candidates = results.get('metrics') or []
-                # If directory is provided, scan for metrics*.json
+                # If directory is provided, scan for metrics*.json (freshest file first)
                 out_dir = results.get('directory')
                 if out_dir and not metrics_candidates:
                     try:
-                        p = Path(out_dir)
-                        metrics_candidates = [str(p / f.name) for f in p.glob('metrics*.json')]
+                        with os.scandir(out_dir) as it:
+                            found = [
+                                (entry.stat().st_mtime_ns, entry.path) for entry in it
+                                if entry.name.startswith('metrics') and entry.name.endswith('.json')
+                                and entry.is_file()
+                            ]
+                        metrics_candidates = [path for _, path in sorted(found, reverse=True)]
                     except Exception:
                         metrics_candidates = []
 
                 # Try to parse candidate files (prefer explicit iteration and distance keys)
                 for candidate in metrics_candidates:
                     try:
-                        candidate_path = Path(candidate)
-                        if not candidate_path.exists():
-                            # candidate may already be a Path-like object
+                        try:
+                            data = json_utils.loads(Path(candidate).read_bytes())
+                        except FileNotFoundError:
                             continue
-                        with open(candidate_path, 'r') as fh:
-                            data = json.load(fh)
                         # Accept nested structures: try explicit distance key names (including legacy keys)
-                        d_key = next((k for k in ('distance','avg_distance','qtdDistance','qtd_distancia','qtd_distance','distancia','total_distance','distancia_total') if k in data), None)
+                        d_key = _distance_key(data)
                         if d_key:
                             try:
                                 d_val = float(data[d_key])
@@ -378,7 +832,7 @@ class EvacuationProblem(Problem):
                         # also check under a 'metrics' object
                         # also check under a 'metrics' object for distance
                         if 'metrics' in data and isinstance(data['metrics'], dict):
-                            d_key = next((k for k in ('distance','avg_distance','qtdDistance','qtd_distancia','qtd_distance','distancia','total_distance','distancia_total') if k in data['metrics']), None)
+                            d_key = _distance_key(data['metrics'])
                             if d_key:
                                 try:
                                     d_val = float(data['metrics'][d_key])
@@ -389,39 +843,17 @@ class EvacuationProblem(Problem):
                     except Exception as e:
                         logger.debug(f"Failed to parse metrics candidate {candidate}: {e}")
 
-                # If nothing found in metrics files, try parsing raw stdout/stderr for explicit printed time/distance
-                if stdout:
-                    try:
-                        s_time = None
-                        s_dist = None
-                        for line in str(stdout).splitlines():
-                            line = line.strip().lower()
-                            # Look for explicit time lines
-                            if 'tempo' in line and any(tok in line for tok in ('tempo','time')):
-                                # attempt to parse a float from the line
-                                parts = line.replace(',', '.').split()
-                                for p in reversed(parts):
-                                    try:
-                                        s_time = float(p)
-                                        break
-                                    except Exception:
-                                        continue
-                            # Look for explicit distance lines
-                            # also capture legacy printed tokens like 'qtdDistance' or 'qtd distancia'
-                            if 'dist' in line or 'distância' in line or 'distance' in line or 'qtd' in line:
-                                parts = line.replace(',', '.').split()
-                                for p in reversed(parts):
-                                    try:
-                                        s_dist = float(p)
-                                        break
-                                    except Exception:
-                                        continue
-                        # prefer distance parsing from stdout
-                        if s_dist is not None:
-                            nd = float(num_doors) if num_doors is not None else None
-                            return [nd, float(s_dist)]
-                    except Exception as e:
-                        logger.debug(f"Failed to parse stdout for metrics: {e}")
+                # If nothing found in metrics files, parse raw stdout (then stderr, where the
+                # simulator logger writes) for the last printed distance value
+                for stream in (stdout, stderr):
+                    if not stream:
+                        continue
+                    last = None
+                    for last in _DIST_RE.finditer(str(stream)):
+                        pass
+                    if last is not None:
+                        nd = float(num_doors) if num_doors is not None else None
+                        return [nd, float(last.group(1).replace(',', '.'))]
 
             # If nothing found (for iterations and distance), log context and return Nones
             logger.debug("Unable to extract iterations and distance from simulator results. Returning Nones.")
@@ -457,6 +889,12 @@ class NSGAIntegration:
         self.simulator_integration = simulator_integration
         self.nsga = None
         self.factory = None
+        self._pool = None
+        # Assinatura dos parâmetros do último setup_optimization (ver setup_optimization)
+        self._last_cfg_sig = None
+        # Avaliações já lidas de metrics_index.jsonl (por nome) e até onde o arquivo foi lido
+        self._indexed_evals: Dict[str, Dict] = {}
+        self._metrics_offset = 0
     
     def load_configuration(self, config_file: Path) -> bool:
         """
@@ -476,14 +914,14 @@ class NSGAIntegration:
             # Detecta se é formato unificado ou legado
             if 'nsga_config' in config:
                 # Formato unificado
-                print("DEBUG: Detectado formato unificado")
+                logger.debug("Detectado formato unificado")
                 nsga_config = config['nsga_config']
                 simulation_params = config.get('simulation_params', {})
                 
                 # Valida configuração NSGA-II necessária
                 required_keys = ['population_size', 'generations', 'crossover_rate', 'mutation_rate']
                 if not all(key in nsga_config for key in required_keys):
-                    print("Configuração unificada inválida: chaves NSGA-II obrigatórias ausentes")
+                    logger.error("Configuração unificada inválida: chaves NSGA-II obrigatórias ausentes")
                     return False
                 
                 # Armazena configurações separadamente
@@ -493,22 +931,21 @@ class NSGAIntegration:
                 
             else:
                 # Formato legado (compatibilidade)
-                print("DEBUG: Detectado formato legado")
+                logger.debug("Detectado formato legado")
                 required_keys = ['population_size', 'generations', 'crossover_rate', 'mutation_rate']
                 if not all(key in config for key in required_keys):
-                    print("Configuração legada inválida: chaves obrigatórias ausentes")
+                    logger.error("Configuração legada inválida: chaves obrigatórias ausentes")
                     return False
                 
                 self.config = config
                 self.simulation_params = {}
                 self.is_unified_format = False
             
-            print(f"DEBUG: Configuração carregada - NSGA: {self.config}")
-            print(f"DEBUG: Parâmetros de simulação: {self.simulation_params}")
+            logger.debug("Configuração carregada - NSGA: %s; simulação: %s", self.config, self.simulation_params)
             return True
             
         except Exception as e:
-            print(f"Erro ao carregar configuração: {e}")
+            logger.error("Erro ao carregar configuração: %s", e)
             return False
     
     def get_simulation_params(self) -> Dict:
@@ -548,9 +985,7 @@ class NSGAIntegration:
                 if char == '2':
                     door_positions.append((x, y))
         
-        print(f"DEBUG: Encontradas {len(door_positions)} portas existentes no mapa")
-        if door_positions:
-            print(f"DEBUG: Posições das portas: {door_positions}")
+        logger.debug("Encontradas %d portas existentes no mapa: %s", len(door_positions), door_positions)
         return door_positions
     
     def setup_optimization(
@@ -572,53 +1007,89 @@ class NSGAIntegration:
         Returns:
             True se configurou com sucesso, False caso contrário
         """
+        # Só a configuração pela interface usa o streamlit; os processos de avaliação que
+        # importam este módulo não pagam a importação
+        import streamlit as st
         try:
-            print("DEBUG: Iniciando setup_optimization...")
-            st.info("Iniciando setup_optimization...")
+            # Mensagens informativas na interface apenas no "Modo verboso" (erros são sempre exibidos)
+            verbose = bool(self.get_simulation_params().get('verbose', False))
+            logger.debug("Iniciando setup_optimization...")
+            if verbose:
+                st.info("Iniciando setup_optimization...")
             
             # Check if pymoo modules are available
-            print("DEBUG: Verificando módulos pymoo...")
-            if NSGA2 is None or Problem is None or minimize is None:
-                print("DEBUG: Módulos pymoo não disponíveis")
+            if not _ensure_imports() or Problem is None:
                 st.error("Módulos pymoo não disponíveis")
                 return False
             
-            print(f"DEBUG: hasattr config: {hasattr(self, 'config')}")
             if not hasattr(self, 'config'):
-                print("DEBUG: Configuração NSGA-II não carregada")
                 st.error("Configuração NSGA-II não carregada")
                 return False
             
-            st.info(f"Configuração NSGA-II: {self.config}")
-            st.info(f"Map template length: {len(map_template)}")
-            st.info(f"Individuals template keys: {list(individuals_template.keys()) if isinstance(individuals_template, dict) else 'Not a dict'}")
-            st.info(f"Door positions: {len(door_positions)}")
+            if verbose:
+                st.info(f"Configuração NSGA-II: {self.config}")
+                st.info(f"Map template length: {len(map_template)}")
+                st.info(f"Individuals template keys: {list(individuals_template.keys()) if isinstance(individuals_template, dict) else 'Not a dict'}")
+                st.info(f"Door positions: {len(door_positions)}")
             
-            print("DEBUG: Criando EvacuationProblem...")
-            st.info("Criando EvacuationProblem...")
-            # Cria o problema de evacuação
-            self.problem = EvacuationProblem(
-                self.simulator_integration, 
-                map_template, 
+            # Mesmos templates, portas e configuração da chamada anterior: o problema (com seu
+            # cache de avaliações e tabelas pré-computadas) e o pool de threads são reaproveitados
+            cfg_sig = hashlib.blake2b(repr((
+                map_template,
                 individuals_template,
-                door_positions,
-                self.get_simulation_params()
-            )
-            print("DEBUG: Problem criado com sucesso")
-            st.success("Problem criado com sucesso")
+                [tuple(dp) for dp in door_positions],
+                sorted(self.config.items()),
+                sorted(self.get_simulation_params().items())
+            )).encode(), digest_size=16).digest()
+            if cfg_sig == self._last_cfg_sig and self._pool is not None:
+                logger.debug("Configuração inalterada, reutilizando EvacuationProblem")
+            else:
+                # Pool de threads que avalia os indivíduos da população em paralelo: cada thread apenas
+                # prepara os arquivos e aguarda o simulador, que roda nos workers de processo
+                self.close()
+                self._pool = ThreadPool(min(os.cpu_count() or 1, int(self.config['population_size'])))
+
+                logger.debug("Criando EvacuationProblem...")
+                if verbose:
+                    st.info("Criando EvacuationProblem...")
+                # Cria o problema de evacuação
+                self.problem = EvacuationProblem(
+                    self.simulator_integration, 
+                    map_template, 
+                    individuals_template,
+                    door_positions,
+                    self.get_simulation_params(),
+                    runner=self._pool.map,
+                    cache_size=4 * int(self.config['population_size'])
+                )
+                self.problem.load_eval_cache(self._eval_cache_file())
+                # Tabela (n_portas x 2) com as posições, usada para decodificar as soluções em save_results
+                self._door_table = np.asarray(door_positions, dtype=np.int64).reshape(-1, 2)
+                self._last_cfg_sig = cfg_sig
+                logger.debug("Problem criado com sucesso")
+                if verbose:
+                    st.success("Problem criado com sucesso")
             
-            st.info("Configurando algoritmo NSGA-II...")
+            if verbose:
+                st.info("Configurando algoritmo NSGA-II...")
             # Cria o algoritmo NSGA-II
+            # Sempre recriado: uma população inicial fornecida substitui a amostragem aleatória.
+            # A amostragem fica em self._sampling para o modo steady_state (run_optimization_async)
+            self._sampling = (
+                np.asarray(initial_population, dtype=bool)
+                if initial_population is not None and len(initial_population) > 0
+                else BinaryRandomSampling()
+            )
             self.algorithm = NSGA2(
                 pop_size=self.config['population_size'],
-                sampling=BinaryRandomSampling(),
+                sampling=self._sampling,
                 crossover=HalfUniformCrossover(),
                 mutation=BitflipMutation(prob=self.config['mutation_rate']),
-                eliminate_duplicates=True
+                eliminate_duplicates=PackedBitDuplicateElimination()
             )
-            st.success("Algoritmo NSGA-II configurado com sucesso")
-            
-            st.success("setup_optimization concluído com sucesso!")
+            if verbose:
+                st.success("Algoritmo NSGA-II configurado com sucesso")
+                st.success("setup_optimization concluído com sucesso!")
             return True
             
         except Exception as e:
@@ -628,6 +1099,34 @@ class NSGAIntegration:
             st.code(traceback.format_exc())
             return False
     
+    def _eval_cache_file(self) -> Path:
+        """Arquivo onde os objetivos já simulados são mantidos entre execuções."""
+        return Path(self.simulator_integration.output_path) / 'eval_cache.json'
+
+    def close(self) -> None:
+        """Encerra o pool de threads de avaliação criado em setup_optimization e apaga o
+        individuals.json compartilhado do problema."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        problem = getattr(self, 'problem', None)
+        if problem is not None:
+            problem.runner = None
+            problem.remove_individuals_file()
+        self._last_cfg_sig = None
+
+    def shutdown(self) -> None:
+        """Encerra o pool de threads e os workers do simulador mantidos entre execuções."""
+        self.close()
+        self.simulator_integration.stop_workers()
+
+    def __del__(self):
+        try:
+            self.shutdown()
+        except Exception:
+            pass
+
     def run_optimization(self) -> Optional[Dict]:
         """
         Executa a otimização NSGA-II com pymoo.
@@ -636,36 +1135,221 @@ class NSGAIntegration:
             Resultado da otimização do pymoo, ou None em caso de erro
         """
         if not hasattr(self, 'problem') or not hasattr(self, 'algorithm'):
-            print("NSGA-II não configurado")
+            logger.error("NSGA-II não configurado")
             return None
+
+        if self.config.get('async_backend') == 'steady_state':
+            return self.run_optimization_async()
         
         try:
-            print(f"DEBUG: Iniciando otimização pymoo...")
-            print(f"  - population_size: {self.config['population_size']}")
-            print(f"  - generations: {self.config['generations']}")
-            print(f"  - mutation_rate: {self.config['mutation_rate']}")
+            logger.debug(
+                "Iniciando otimização pymoo (population_size=%s, generations=%s, mutation_rate=%s)",
+                self.config['population_size'], self.config['generations'], self.config['mutation_rate']
+            )
             
-            # Executa a otimização usando pymoo
-            res = minimize(
-                self.problem,
-                self.algorithm,
-                termination=('n_gen', self.config['generations']),
-                seed=1,
-                verbose=True
+            # Workers persistentes: o simulador é importado uma vez por processo, não por avaliação.
+            # O pool é criado no primeiro uso e reaproveitado pelas execuções seguintes (ver shutdown)
+            self.simulator_integration.start_workers()
+            # Para antes de 'generations' quando a frente de Pareto estabiliza: a melhora
+            # dos objetivos fica abaixo de ftol ao longo de termination_period gerações
+            termination = DefaultMultiObjectiveTermination(
+                xtol=1e-8,
+                cvtol=1e-6,
+                ftol=self.config.get('ftol', 1e-5),
+                period=self.config.get('termination_period', 30),
+                n_max_gen=self.config['generations']
             )
+            try:
+                # Executa a otimização usando pymoo
+                res = minimize(
+                    self.problem,
+                    self.algorithm,
+                    termination=termination,
+                    seed=1,
+                    verbose=True
+                )
+            finally:
+                self.problem.save_eval_cache(self._eval_cache_file())
             
-            print(f"DEBUG: Otimização concluída")
-            print(f"  - Soluções encontradas: {len(res.X)}")
-            print(f"  - Objetivos: {len(res.F)}")
+            logger.debug("Otimização concluída: %d soluções, %d objetivos", len(res.X), len(res.F))
             
             return res
             
         except Exception as e:
-            import traceback
-            print(f"Erro na execução da otimização: {e}")
-            print(f"Traceback completo: {traceback.format_exc()}")
+            logger.exception("Erro na execução da otimização: %s", e)
             return None
     
+    def run_optimization_async(self) -> Optional[Dict]:
+        """
+        Executa o NSGA-II em regime estacionário (steady-state) assíncrono.
+
+        Cada descendente é avaliado assim que um worker fica livre e entra na população
+        logo que sua avaliação termina, sem esperar o indivíduo mais lento da geração.
+        O orçamento total é de population_size * generations avaliações.
+
+        Returns:
+            Resultado da otimização do pymoo, ou None em caso de erro
+        """
+        if not hasattr(self, 'problem') or self._pool is None:
+            logger.error("NSGA-II não configurado")
+            return None
+
+        try:
+            pop_size = int(self.config['population_size'])
+            budget = pop_size * int(self.config['generations'])
+            n_workers = min(os.cpu_count() or 1, pop_size)
+
+            # Mesmo algoritmo de setup_optimization, mas gerando um descendente por vez
+            algorithm = NSGA2(
+                pop_size=pop_size,
+                n_offsprings=1,
+                sampling=self._sampling,
+                crossover=HalfUniformCrossover(),
+                mutation=BitflipMutation(prob=self.config['mutation_rate']),
+                eliminate_duplicates=PackedBitDuplicateElimination()
+            )
+            algorithm.setup(self.problem, termination=('n_eval', budget), seed=1)
+
+            # Avaliações concluídas chegam nesta fila como (chave, objetivos), em qualquer ordem
+            done = queue.Queue()
+
+            def penalize(key, exc):
+                # Uma exceção aqui indica falha de configuração, não um indivíduo ruim: registra antes de penalizar
+                logger.error("Avaliação %s falhou; aplicando penalidade 1e6", key,
+                             exc_info=(type(exc), exc, exc.__traceback__))
+                done.put((key, [1e6, 1e6]))
+
+            def submit(key, gene):
+                self._pool.apply_async(
+                    self.problem._evaluate_single, (gene,),
+                    callback=lambda f: done.put((key, f)),
+                    error_callback=lambda e: penalize(key, e)
+                )
+
+            self.simulator_integration.start_workers()
+            try:
+                # A população inicial é avaliada por completo antes da primeira seleção
+                initial = algorithm.ask()
+                for i, ind in enumerate(initial):
+                    submit(i, ind.X)
+                raw = [None] * len(initial)
+                for _ in range(len(initial)):
+                    i, f = done.get()
+                    raw[i] = f
+                initial.set("F", self.problem._objectives_matrix(raw, len(initial)))
+                algorithm.evaluator.n_eval = len(initial)
+                algorithm.tell(infills=initial)
+
+                submitted = len(initial)
+                pending = {}
+
+                def launch() -> bool:
+                    off = algorithm.ask()
+                    if off is None or len(off) == 0:
+                        return False
+                    pending[submitted] = off
+                    submit(submitted, off[0].X)
+                    return True
+
+                while submitted < budget and len(pending) < n_workers and launch():
+                    submitted += 1
+
+                # Cada resultado atualiza a população e libera o worker para o próximo descendente
+                while pending:
+                    key, f = done.get()
+                    off = pending.pop(key)
+                    off.set("F", self.problem._objectives_matrix([f], 1))
+                    algorithm.evaluator.n_eval += 1
+                    algorithm.tell(infills=off)
+                    if submitted < budget and launch():
+                        submitted += 1
+            finally:
+                self.problem.save_eval_cache(self._eval_cache_file())
+
+            res = algorithm.result()
+            logger.debug("Otimização assíncrona concluída (%d avaliações)", algorithm.evaluator.n_eval)
+            return res
+
+        except Exception as e:
+            logger.exception("Erro na execução da otimização: %s", e)
+            return None
+
+    def _read_metrics_index(self, index_file: Path) -> Optional[List[Dict]]:
+        """
+        Lê as linhas novas de metrics_index.jsonl desde a última chamada.
+
+        Args:
+            index_file: Arquivo de índice escrito por SimulatorIntegration.run_simulator
+
+        Returns:
+            Avaliações conhecidas (a última de cada nome), ordenadas pelo caminho do metrics.json,
+            ou None se o índice não existe
+        """
+        try:
+            size = index_file.stat().st_size
+        except FileNotFoundError:
+            return None
+        if size < self._metrics_offset:
+            # Arquivo recriado: recomeça do início
+            self._indexed_evals = {}
+            self._metrics_offset = 0
+        if size > self._metrics_offset:
+            with open(index_file, 'rb') as f:
+                f.seek(self._metrics_offset)
+                chunk = f.read(size - self._metrics_offset)
+            # Uma linha final sem '\n' ainda está sendo escrita: fica para a próxima leitura
+            end = chunk.rfind(b'\n') + 1
+            for line in chunk[:end].splitlines():
+                try:
+                    entry = json_utils.loads(line)
+                    self._indexed_evals[entry['eval']] = entry
+                except Exception as e:
+                    logger.debug(f"failed to parse metrics index line {line[:200]!r}: {e}")
+            self._metrics_offset += end
+        return sorted(self._indexed_evals.values(), key=lambda e: e['path'])
+
+    def _index_matches_eval_dirs(self, on_disk, evals: List[Dict]) -> bool:
+        """Indica se o índice lista exatamente as avaliações em `on_disk` (nomes dos nsga_eval_*/metrics.json)."""
+        indexed = {e['eval'] for e in evals if str(e.get('eval', '')).startswith('nsga_eval_')}
+        if indexed != on_disk:
+            logger.debug("metrics index out of sync (%d indexed, %d on disk); scanning",
+                         len(indexed), len(on_disk))
+            return False
+        return True
+
+    def _scan_metrics(self, base_output: Path) -> List[Dict]:
+        """
+        Coleta as métricas varrendo todos os metrics.json sob a saída do simulador.
+
+        Usado quando não há metrics_index.jsonl ou quando ele não cobre todas as avaliações.
+        """
+        # Collect any metrics.json files under the simulator output tree (recursive);
+        # large sets are read and parsed in parallel, only small tuples come back
+        paths = sorted(base_output.rglob('metrics.json'))
+        if len(paths) >= _PARALLEL_METRICS_MIN:
+            with ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn")
+            ) as ex:
+                loaded = list(ex.map(_load_metric, paths, chunksize=16))
+        else:
+            loaded = [_load_metric(p) for p in paths]
+
+        evals = []
+        for metrics_file, item in zip(paths, loaded):
+            if item is None:
+                logger.debug(f"failed to read/parse {metrics_file}")
+                continue
+            name, path, d, nd, it = item
+            evals.append({
+                'eval': name,
+                'path': path,
+                'distancia_total': d,
+                'num_doors': nd,
+                'iterations': it
+            })
+        return evals
+
     def save_results(self, result: Dict, output_file: Path) -> bool:
         """
         Salva os resultados da otimização pymoo.
@@ -677,249 +1361,205 @@ class NSGAIntegration:
         Returns:
             True se salvou com sucesso, False caso contrário
         """
-        def _to_native(o):
-            """Recursively convert numpy types to native Python types for JSON serialization."""
+        try:
+            door_table = getattr(self, '_door_table', None)
+            if door_table is None or len(door_table) != len(self.problem.door_positions):
+                door_table = np.asarray(self.problem.door_positions, dtype=np.int64).reshape(-1, 2)
+            # Matriz booleana com todas as soluções; os genes além do número de portas são ignorados
+            selected = np.asarray(result.X, dtype=bool)
+            n_genes = min(selected.shape[1], len(door_table))
+            # Portas ativas por solução (gene completo) em uma única redução NumPy
+            num_doors = np.count_nonzero(np.asarray(result.X), axis=1).tolist()
+            selected, door_table = selected[:, :n_genes], door_table[:n_genes]
+
+            # Per-eval metrics files found with a single directory scan (no stat per solution),
+            # shared with the aggregation's index check
+            base_output = Path(self.simulator_integration.output_path)
             try:
-                # numpy scalars
-                import numpy as _np
-                if isinstance(o, (_np.integer,)):
-                    return int(o)
-                if isinstance(o, (_np.floating,)):
-                    return float(o)
-                if isinstance(o, (_np.ndarray,)):
-                    return _to_native(o.tolist())
+                eval_metrics = {p.parent.name: p for p in base_output.glob('nsga_eval_*/metrics.json')}
             except Exception:
-                pass
-
-            if isinstance(o, list):
-                return [_to_native(x) for x in o]
-            if isinstance(o, tuple):
-                return tuple(_to_native(x) for x in o)
-            if isinstance(o, dict):
-                return {str(k): _to_native(v) for k, v in o.items()}
-            # Fallback: try to coerce numeric-like objects
-            try:
-                if hasattr(o, 'item'):
-                    return _to_native(o.item())
-                # try int/float conversions
-                try:
-                    return int(o)
-                except Exception:
-                    pass
-                try:
-                    return float(o)
-                except Exception:
-                    pass
-            except Exception:
-                pass
-            # builtin types (int, float, str, bool, None) are fine
-            return o
+                eval_metrics = {}
 
-        try:
-            results = []
-            for i, (solution, objectives) in enumerate(zip(result.X, result.F)):
-                # Decodifica a solução para posições de portas
-                door_positions = []
-                for j, bit in enumerate(solution):
-                    if int(bit) == 1 and j < len(self.problem.door_positions):
-                        # ensure native ints
-                        dp = self.problem.door_positions[j]
-                        if isinstance(dp, (list, tuple)):
-                            dp = (int(dp[0]), int(dp[1]))
-                        door_positions.append(dp)
-
-                # Objectives expected to be [num_doors, distance] (2 elements)
-                # Convert numpy arrays to native lists if necessary
-                try:
-                    obj_list = objectives.tolist()
-                except Exception:
-                    # if objectives is a list/tuple
-                    obj_list = list(objectives)
-
-                # Ensure the objectives array length is 2
-                if len(obj_list) > 2:
-                    obj_list = obj_list[:2]
-                elif len(obj_list) < 2:
-                    # pad missing distance with None (caller/consumer may apply penalties)
-                    obj_list = obj_list + [None] * (2 - len(obj_list))
-
-                # attempt to get auxiliary iterations value from per-eval metrics if available
-                aux_iterations = None
-                try:
-                    # some result objects embed auxiliary info; otherwise will be filled during aggregation
-                    aux_iterations = getattr(objectives, 'iterations', None)
-                except Exception:
-                    aux_iterations = None
-
-                # If no auxiliary iterations found on the objectives object, try reading
-                # the per-eval metrics file produced by the simulator for this evaluation.
-                # The simulator writes metrics to simulador_heuristica/output/nsga_eval_<id>/metrics.json
-                if aux_iterations is None:
-                    try:
-                        base_output = Path(self.simulator_integration.output_path)
-                        eval_dir = base_output / f'nsga_eval_{i}'
-                        metrics_file = eval_dir / 'metrics.json'
-                        if metrics_file.exists():
-                            try:
-                                md = json.loads(metrics_file.read_text())
-                                aux_iterations = md.get('iterations') or md.get('qtd_iteracoes') or md.get('iters') or md.get('tempo_total')
-                            except Exception:
-                                aux_iterations = None
-                    except Exception:
-                        aux_iterations = None
-
-                res_obj = {
-                    "solution_id": int(i),
-                    "gene": _to_native(solution.tolist()),
-                    "door_positions": _to_native(door_positions),
-                    "objectives": _to_native(obj_list),
-                    "num_doors": int(int(sum(solution))),
-                    "iterations": int(aux_iterations) if aux_iterations is not None else None
-                }
-                results.append(res_obj)
-
-            # Atomic write: write to temp file then replace
-            tmp_path = output_file.with_suffix('.tmp')
-            try:
-                with open(tmp_path, 'w') as f:
-                    json.dump(results, f, indent=2)
-                # replace atomically
-                tmp_path.replace(output_file)
-            finally:
-                if tmp_path.exists():
-                    try:
-                        tmp_path.unlink()
-                    except Exception:
-                        pass
+            # Aggregate per-eval metrics first, so each result record can be completed
+            # (iterations backfilled) and streamed to disk as soon as it is built
+            evals = self._aggregate_metrics(output_file, set(eval_metrics))
+            matched = self._match_saved_solutions(result, evals) if evals else None
 
-            # Aggregate per-eval metrics into consolidated metrics.json for the main experiment
+            # Stream the records to a temp file ('[', records separated by ',', ']') instead of
+            # building the whole list; then fsync and replace atomically
+            tmp_path = _tmp_path_for(output_file)
             try:
-                # Attempt to infer simulation_name from output_file name: results_<simname>_timestamp.json
-                sim_name = None
-                parts = output_file.stem.split('_')
-                if len(parts) >= 2 and parts[0] == 'results':
-                    sim_name = parts[1]
-                if sim_name:
-                    base_output = Path(self.simulator_integration.output_path)
-                    consolidated_dir = base_output / sim_name
-                    consolidated_dir.mkdir(parents=True, exist_ok=True)
-
-                    # Collect any metrics.json files under the simulator output tree (recursive)
-                    evals = []
-                    for metrics_file in sorted(base_output.rglob('metrics.json')):
-                        try:
-                            # ignore consolidated per-simulation metrics.json (those live under base_output/<sim_name>/metrics.json)
-                            # but accept any per-eval metrics.json produced by simulator runs
-                            data = json.loads(metrics_file.read_text())
-                            d = data.get('distancia_total') or data.get('total_distance') or data.get('distance') or data.get('qtdDistance')
-                            it = (
-                                data.get('iterations') or
-                                data.get('tempo_total') or
-                                data.get('total_time') or
-                                data.get('qtd_iteracoes') or
-                                data.get('iters')
-                            )
-                            nd = data.get('num_doors') or data.get('qtd_doors') or None
-                            evals.append({
-                                'eval': metrics_file.parent.name,
-                                'path': str(metrics_file),
-                                'distancia_total': float(d) if d is not None else None,
-                                'num_doors': int(nd) if nd is not None else None,
-                                'iterations': int(it) if it is not None else None
-                            })
-                        except Exception as e:
-                            logger.debug(f"failed to read/parse {metrics_file}: {e}")
-
-                    consolidated = {
-                        'algorithm': 'NSGA-II',
-                        'simulation_name': sim_name,
-                        'num_evals': len(evals),
-                        'evaluations': evals
-                    }
-                    consolidated_path = consolidated_dir / 'metrics.json'
-                    # atomic write
-                    tmp_c = consolidated_path.with_suffix('.tmp')
-                    with open(tmp_c, 'w') as f:
-                        json.dump(consolidated, f, indent=2)
-                    tmp_c.replace(consolidated_path)
-
-                    # Backfill iterations into the per-solution results file by matching evaluations
-                    try:
-                        # load previously written results file (output_file)
-                        if output_file.exists():
+                with open(tmp_path, 'wb') as f:
+                    f.write(b'[')
+                    for i, (solution, objectives) in enumerate(zip(result.X, result.F)):
+                        # Decodifica a solução para posições de portas (indexação booleana, já em ints nativos)
+                        door_positions = door_table[selected[i]].tolist()
+
+                        # Objectives expected to be [num_doors, distance] (2 elements), as native floats
+                        obj_list = [float(v) if v is not None else None for v in np.ravel(objectives).tolist()]
+
+                        # Ensure the objectives array length is 2
+                        if len(obj_list) > 2:
+                            obj_list = obj_list[:2]
+                        elif len(obj_list) < 2:
+                            # pad missing distance with None (caller/consumer may apply penalties)
+                            obj_list = obj_list + [None] * (2 - len(obj_list))
+
+                        # some result objects embed auxiliary info; otherwise will be filled during aggregation
+                        aux_iterations = getattr(objectives, 'iterations', None)
+
+                        # If no auxiliary iterations found on the objectives object, try reading
+                        # the per-eval metrics file produced by the simulator for this evaluation.
+                        # The simulator writes metrics to simulador_heuristica/output/nsga_eval_<id>/metrics.json
+                        metrics_file = eval_metrics.get(f'nsga_eval_{i}')
+                        if aux_iterations is None and metrics_file is not None:
                             try:
-                                raw_results = json.loads(output_file.read_text())
+                                md = json_utils.loads(metrics_file.read_bytes())
+                                aux_iterations = md.get('iterations') or md.get('qtd_iteracoes') or md.get('iters') or md.get('tempo_total')
                             except Exception:
-                                raw_results = results
-                        else:
-                            raw_results = results
-
-                        # Helper to extract numeric distance from eval entry
-                        def _eval_distance(e):
-                            for k in ('distancia_total','distancia','distance','dist'):
-                                if k in e and e.get(k) is not None:
-                                    try:
-                                        return float(e.get(k))
-                                    except Exception:
-                                        try:
-                                            return float(str(e.get(k)).replace(',','.'))
-                                        except Exception:
-                                            return None
-                            return None
-
-                        # Try to match each saved result to an evaluation and set iterations when found
-                        for r in raw_results:
-                            if r.get('iterations') is None:
-                                r_num = r.get('num_doors')
-                                r_dist = None
-                                try:
-                                    if isinstance(r.get('objectives'), (list,tuple)) and len(r.get('objectives')) >= 2:
-                                        r_dist = float(r.get('objectives')[1])
-                                except Exception:
-                                    r_dist = None
-
-                                matched_iter = None
-                                for e in evals:
-                                    try:
-                                        ev_num = e.get('num_doors')
-                                        ev_dist = _eval_distance(e)
-                                        if ev_num is not None and r_num is not None and int(ev_num) == int(r_num):
-                                            # If both distances available, require approximate match; otherwise accept num match
-                                            if r_dist is not None and ev_dist is not None:
-                                                try:
-                                                    if abs(float(ev_dist) - float(r_dist)) <= max(1e-6, 0.001 * abs(float(r_dist))):
-                                                        matched_iter = e.get('iterations') or e.get('qtd_iteracoes') or e.get('iters') or e.get('tempo_total')
-                                                        break
-                                                except Exception:
-                                                    continue
-                                            else:
-                                                matched_iter = e.get('iterations') or e.get('qtd_iteracoes') or e.get('iters') or e.get('tempo_total')
-                                                break
-                                    except Exception:
-                                        continue
-
-                                if matched_iter is not None:
-                                    try:
-                                        # coerce to int if possible
-                                        r['iterations'] = int(matched_iter)
-                                    except Exception:
-                                        r['iterations'] = matched_iter
-
-                        # rewrite updated results atomically
-                        tmp_r = output_file.with_suffix('.tmp')
-                        with open(tmp_r, 'w') as f:
-                            json.dump(raw_results, f, indent=2)
-                        tmp_r.replace(output_file)
-                    except Exception as e:
-                        logger.debug(f"failed to backfill iterations into results file: {e}")
-
-            except Exception as e:
-                print(f"DEBUG: failed to aggregate per-eval metrics: {e}")
+                                aux_iterations = None
 
+                        # Backfill from the matching aggregated evaluation
+                        if aux_iterations is None and matched is not None and matched[i] >= 0:
+                            aux_iterations = matched[i]
+
+                        res_obj = {
+                            "solution_id": i,
+                            "gene": np.asarray(solution, dtype=np.int8).tolist(),
+                            "door_positions": door_positions,
+                            "objectives": obj_list,
+                            "num_doors": num_doors[i],
+                            "iterations": int(aux_iterations) if aux_iterations is not None else None
+                        }
+                        # same layout as dumping the whole list with indent=2
+                        f.write(b',\n  ' if i else b'\n  ')
+                        f.write(json_utils.dumps(res_obj, indent=True).replace(b'\n', b'\n  '))
+                    f.write(b'\n]' if len(result.X) else b']')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, output_file)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
             return True
 
         except Exception as e:
-            print(f"Erro ao salvar resultados: {e}")
-            import traceback
-            print(traceback.format_exc())
+            logger.exception("Erro ao salvar resultados: %s", e)
             return False
+
+    def _aggregate_metrics(self, output_file: Path, eval_names=None) -> List[Dict]:
+        """
+        Consolida as métricas das avaliações em output/<simulação>/metrics.json.
+
+        Args:
+            output_file: Arquivo de resultados (results_<simulação>_<timestamp>.json)
+            eval_names: Nomes dos nsga_eval_* com metrics.json já listados pelo chamador
+                (evita uma segunda varredura do diretório de saída)
+
+        Returns:
+            Avaliações agregadas (lista vazia se o nome da simulação não puder ser inferido)
+        """
+        try:
+            # Attempt to infer simulation_name from output_file name: results_<simname>_timestamp.json
+            sim_name = None
+            parts = output_file.stem.split('_')
+            if len(parts) >= 2 and parts[0] == 'results':
+                sim_name = parts[1]
+            if not sim_name:
+                return []
+
+            base_output = Path(self.simulator_integration.output_path)
+            consolidated_dir = base_output / sim_name
+            consolidated_dir.mkdir(parents=True, exist_ok=True)
+
+            # Prefer the append-only index written by the simulator integration: only
+            # the lines added since the last save are read. Evaluations that bypassed the
+            # index (e.g. run through the CLI directly) make it incomplete: scan instead
+            evals = self._read_metrics_index(base_output / 'metrics_index.jsonl')
+            if evals is not None and eval_names is None:
+                eval_names = {p.parent.name for p in base_output.glob('nsga_eval_*/metrics.json')}
+            if evals is None or not self._index_matches_eval_dirs(eval_names, evals):
+                evals = self._scan_metrics(base_output)
+
+            consolidated = {
+                'algorithm': 'NSGA-II',
+                'simulation_name': sim_name,
+                'num_evals': len(evals),
+                'evaluations': evals
+            }
+            # Large eval sets: the evaluations go to a columnar Parquet file and metrics.json keeps
+            # only a summary pointing to it (see load_consolidated_evaluations)
+            if getattr(self, 'config', {}).get('metrics_format', 'json') == 'parquet':
+                try:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    parquet_path = consolidated_dir / 'metrics.parquet'
+                    sink = pa.BufferOutputStream()
+                    pq.write_table(pa.Table.from_pylist(evals), sink)
+                    _atomic_write_bytes(parquet_path, sink.getvalue().to_pybytes())
+                    del consolidated['evaluations']
+                    consolidated['parquet'] = parquet_path.name
+                except ImportError:
+                    logger.warning("metrics_format 'parquet' requer pyarrow; gravando métricas em JSON")
+                except Exception as e:
+                    # ex.: tipos mistos em evals; o metrics.json completo continua sendo gravado
+                    logger.warning("Falha ao gravar métricas em Parquet (%s); gravando em JSON", e)
+            consolidated_path = consolidated_dir / 'metrics.json'
+            _atomic_write_bytes(consolidated_path, json_utils.dumps(consolidated, indent=True))
+            return evals
+
+        except Exception as e:
+            logger.debug("failed to aggregate per-eval metrics: %s", e)
+            return []
+
+    def _match_saved_solutions(self, result, evals: List[Dict]) -> Optional[List[int]]:
+        """
+        Associa cada solução do resultado a uma avaliação agregada (ver _match_iterations).
+
+        Returns:
+            Iterações por solução (-1 quando não houve correspondência), ou None em caso de erro
+        """
+        try:
+            # Values are almost always numeric already: branch on the type and only fall
+            # back to parsing (and exceptions) for strings
+            def _int_or(v, default):
+                if isinstance(v, str):
+                    v = _float_or(v, None)
+                if isinstance(v, int):
+                    return int(v)
+                if isinstance(v, float) and math.isfinite(v):
+                    return int(v)
+                return default
+
+            def _float_or(v, default):
+                if isinstance(v, (int, float)):
+                    return float(v)
+                if isinstance(v, str):
+                    try:
+                        return float(v.replace(',', '.'))
+                    except ValueError:
+                        pass
+                return default
+
+            # Helper to extract numeric distance from eval entry
+            def _eval_distance(e):
+                for k in ('distancia_total','distancia','distance','dist'):
+                    v = _float_or(e.get(k), None)
+                    if v is not None:
+                        return v
+                return None
+
+            X = np.asarray(result.X, dtype=bool)
+            F = np.asarray(result.F, dtype=np.float64)
+            r_num = X.sum(axis=1).astype(np.int32)
+            r_dist = F[:, 1] if F.ndim == 2 and F.shape[1] >= 2 else np.full(len(X), np.nan)
+            e_num = np.array([_int_or(e.get('num_doors'), -1) for e in evals], dtype=np.int32)
+            e_dist = np.array([_float_or(_eval_distance(e), np.nan) for e in evals], dtype=np.float64)
+            e_iter = np.array([
+                _int_or(e.get('iterations') or e.get('qtd_iteracoes') or e.get('iters') or e.get('tempo_total'), -1)
+                for e in evals
+            ], dtype=np.int64)
+            return _match_iterations(r_num, np.ascontiguousarray(r_dist), e_num, e_dist, e_iter).tolist()
+        except Exception as e:
+            logger.debug(f"failed to backfill iterations into results file: {e}")
+            return None
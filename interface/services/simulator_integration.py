@@ -4,15 +4,31 @@ Módulo de integração com o simulador de heurística.
 Este módulo implementa as funções necessárias para integrar a interface Streamlit
 com o simulador de evacuação, seguindo as diretrizes da documentação de integração.
 """
+import atexit
+import functools
 import subprocess
 import sys
+import os
+import itertools
 import json
+import mmap
 import shutil
+import threading
+import time
+import traceback
+import multiprocessing
+import weakref
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import sqlite3
 
+import numpy as np
+
+from . import json_utils
+from .logger import default_log as logger
+
 # ======= STRUCTURE MAP =======
 # Import 'simulador_heuristica' in a robust way: if the package isn't on sys.path
 # (for example when Streamlit imports modules from the `interface/` folder),
@@ -27,6 +43,47 @@ except Exception:
         sys.path.insert(0, str(project_root))
     from simulador_heuristica.simulator.constants import Constants
 
+@functools.lru_cache(maxsize=8)
+def _parse_map_file(path: str, mtime_ns: int, size: int) -> np.ndarray:
+    """Converte um map.txt em matriz uint8 somente leitura.
+
+    mtime_ns e size fazem parte da chave do cache, de modo que um arquivo alterado é relido.
+    O arquivo é mapeado em memória (mmap) em vez de copiado por read().
+    """
+    if size == 0:
+        raise ValueError(f"Mapa vazio em {path}")
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lines = [line for line in mm[:].splitlines() if line]
+    if any(len(line) != len(lines[0]) for line in lines):
+        raise ValueError(f"Mapa não retangular em {path}")
+    grid = np.frombuffer(b"".join(lines), dtype=np.uint8) - ord('0')
+    if (grid > 9).any():
+        raise ValueError(f"Mapa com caracteres inválidos em {path}")
+    grid = grid.reshape(len(lines), -1)
+    grid.setflags(write=False)
+    return grid
+
+
+def _expand_grouped_doors(doors) -> Tuple[np.ndarray, np.ndarray]:
+    """Expande portas agrupadas ({'row', 'col', 'size', 'direction'}) nas células que ocupam.
+
+    Retorna (linhas, colunas) de todas as células, porta a porta, prontos para indexar a matriz.
+    As portas são expandidas juntas com np.repeat em vez de uma lista de células por porta.
+    """
+    doors = list(doors)
+    n = len(doors)
+    rows = np.fromiter((d['row'] for d in doors), dtype=np.intp, count=n)
+    cols = np.fromiter((d['col'] for d in doors), dtype=np.intp, count=n)
+    sizes = np.fromiter((max(d['size'], 0) for d in doors), dtype=np.intp, count=n)
+    vertical = np.fromiter((d['direction'] == 'V' for d in doors), dtype=bool, count=n)
+    # Posição de cada célula dentro da sua porta: 0..size-1
+    starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    step = np.arange(sizes.sum()) - starts
+    vertical = np.repeat(vertical, sizes)
+    return (np.repeat(rows, sizes) + np.where(vertical, step, 0),
+            np.repeat(cols, sizes) + np.where(vertical, 0, step))
+
+
 class StructureMap(object):
     """Responsável por armazenar informações físicas do mapa: portas, paredes, etc."""
 
@@ -41,60 +98,159 @@ class StructureMap(object):
         self.len_row = 0
         self.len_col = 0
         self.exits = []
+        self._exits_arr = np.empty((0, 2), dtype=np.intp)
+        # Máscaras booleanas (1 byte por célula) consultadas por isSaida/get_*; mantidas em
+        # sincronia com a matriz por load_map e rewrite_doors
+        self._door_mask = np.zeros((0, 0), dtype=bool)
+        self._empty_mask = np.zeros((0, 0), dtype=bool)
 
     def load_map(self):
-        """Lê o arquivo de mapa e constrói o mapa da estrutura."""
+        """Lê o arquivo de mapa e constrói o mapa da estrutura.
+
+        O mapa vira uma matriz numpy uint8 (linhas x colunas), um dígito por célula. O parse é
+        reaproveitado enquanto o arquivo não muda (ver _parse_map_file); cada instância recebe
+        sua própria cópia, já que rewrite_doors altera a matriz.
+        """
         if not self.path.exists():
             raise FileNotFoundError(f"Mapa não encontrado em {self.path}")
-        with open(self.path, 'r') as file:
-            for line in file:
-                line = line.strip('\n')
-                self.map.append([])
-                for col in line:
-                    self.map[self.len_row].append(int(col))
-                self.len_row += 1
-        self.len_col = len(self.map[0])
+        st = self.path.stat()
+        self.map = _parse_map_file(str(self.path), st.st_mtime_ns, st.st_size).copy()
+        self.len_row, self.len_col = self.map.shape
+        self._door_mask = self.map == Constants.M_DOOR
+        self._empty_mask = self.map == Constants.M_EMPTY
+        self._scan_exits()
         self.exits = self.get_exits()
 
     def get_empty_positions(self) -> List[Tuple[int, int]]:
         """Retorna uma lista com posições vazias do mapa."""
-        empty_positions = []
-        for i in range(self.len_row):
-            for j in range(self.len_col):
-                if self.map[i][j] == Constants.M_EMPTY:
-                    empty_positions.append((i, j))
-        return empty_positions
+        return [tuple(p) for p in np.argwhere(self._empty_mask).tolist()]
 
     def isSaida(self, row: int, col: int) -> bool:
         """Retorna se a posição é uma saída."""
-        return self.map[row][col] == Constants.M_DOOR
+        return bool(self._door_mask[row, col])
 
     def get_exits(self) -> List[Tuple[int, int]]:
-        """Retorna uma lista com as saídas do mapa."""
-        exits = []
-        for i in range(self.len_row):
-            for j in range(self.len_col):
-                if self.map[i][j] == Constants.M_DOOR:
-                    exits.append((i, j))
-        return exits
+        """Retorna uma lista com as saídas do mapa (a partir das posições já calculadas)."""
+        return [tuple(p) for p in self._exits_arr.tolist()]
+
+    def _scan_exits(self):
+        """Recalcula as posições (linha, coluna) das portas; chamado sempre que o mapa muda."""
+        self._exits_arr = np.argwhere(self._door_mask)
 
     def rewrite_doors(self, new_doors):
         """Substitui portas existentes por novas portas."""
-        for exit in self.exits:
-            self.map[exit[0]][exit[1]] = Constants.M_WALL
-        for new_door in new_doors:
-            if new_door['direction'] == 'V':
-                for i in range(new_door['size']):
-                    self.map[new_door['row'] + i][new_door['col']] = Constants.M_DOOR
-            else:
-                for i in range(new_door['size']):
-                    self.map[new_door['row']][new_door['col'] + i] = Constants.M_DOOR
+        old_rows, old_cols = self._exits_arr[:, 0], self._exits_arr[:, 1]
+        self.map[old_rows, old_cols] = Constants.M_WALL
+        self._door_mask[old_rows, old_cols] = False
+        rows, cols = _expand_grouped_doors(new_doors)
+        # Células fora do mapa são ignoradas (índices negativos dariam a volta na matriz)
+        inside = (rows >= 0) & (rows < self.len_row) & (cols >= 0) & (cols < self.len_col)
+        cells = (rows[inside], cols[inside])
+        self.map[cells] = Constants.M_DOOR
+        self._door_mask[cells] = True
+        self._empty_mask[cells] = False
+        self._scan_exits()
         self.exits = self.get_exits()
 
 
+# ======= FILE COPY =======
+# Cópias feitas dentro do kernel, na ordem de preferência: copy_file_range (que pode clonar
+# os blocos via reflink/cópia no servidor quando origem e destino estão no mesmo sistema de
+# arquivos) e sendfile. Ambas recebem (fd_origem, fd_destino, offset, quantidade).
+_KERNEL_COPIES = (
+    lambda fin, fout, offset, count: os.copy_file_range(fin, fout, count, offset, offset),
+    lambda fin, fout, offset, count: os.sendfile(fout, fin, offset, count),
+)
+
+
+def _fast_copy(src: Path, dst: Path) -> None:
+    """Copia src para dst dentro do kernel, sem passar os bytes pelo Python.
+
+    Tenta os.copy_file_range e depois os.sendfile; em plataformas sem essas chamadas ou quando
+    ambas falham (ex.: entre dispositivos), recorre a shutil.copyfileobj com blocos de até
+    1 MiB, o que reduz o número de syscalls em volumes de rede. Os horários do arquivo de
+    origem são mantidos no destino.
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        st = os.fstat(fsrc.fileno())
+        _copy_contents(fsrc, fdst, st.st_size)
+    # preserva os horários de acesso/modificação, como shutil.copy2
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def _copy_contents(fsrc, fdst, size: int) -> None:
+    for kernel_copy in _KERNEL_COPIES:
+        offset = 0
+        try:
+            while offset < size:
+                copied = kernel_copy(fsrc.fileno(), fdst.fileno(), offset, size - offset)
+                if copied == 0:
+                    break
+                offset += copied
+        except (OSError, AttributeError):
+            continue
+        if offset >= size:
+            return
+        if offset:
+            raise OSError(f"cópia interrompida após {offset} de {size} bytes")
+        # 0 já no início: o sistema de arquivos não suporta este método; tenta o próximo
+    fsrc.seek(0)
+    fdst.seek(0)
+    fdst.truncate()
+    shutil.copyfileobj(fsrc, fdst, length=max(1, min(1 << 20, size)))
+
+
+# ======= SIMULATOR LOG =======
+_LOG_TAIL_BYTES = 64 * 1024
+
+
+def _read_log_tail(log_path: Path, max_bytes: int = _LOG_TAIL_BYTES) -> str:
+    """Retorna as últimas linhas completas do log, limitadas a max_bytes."""
+    with open(log_path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - max_bytes))
+        tail = f.read()
+    if size > max_bytes:
+        # descarta a primeira linha, possivelmente cortada no meio
+        tail = tail.partition(b'\n')[2]
+    return tail.decode('utf-8', errors='replace')
+
+
+# ======= SIMULATOR WORKERS =======
+# Módulo do simulador importado uma única vez por processo worker (ver _init_simulator_worker)
+_worker_simulator = None
+
+
+def _init_simulator_worker(project_root: str):
+    """Inicializador dos workers persistentes: importa o simulador uma vez por processo."""
+    global _worker_simulator
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from simulador_heuristica.simulator import main as simulator_main
+    _worker_simulator = simulator_main
+
+
+def _run_simulator_in_worker(
+    experiment_name: str,
+    draw: bool,
+    scenario_seed: Optional[int],
+    simulation_seed: Optional[int]
+) -> Tuple[int, str, str]:
+    """Executa uma simulação no worker e retorna (returncode, stdout, stderr), como a CLI."""
+    try:
+        iterations, distance = _worker_simulator.run(experiment_name, draw, scenario_seed, simulation_seed)
+        return 0, f"qtd iteracoes {iterations}\nqtd distancia {distance}\n", ""
+    except Exception:
+        return 1, "", traceback.format_exc()
+
+
 # ======= SIMULATOR INTEGRATION =======
 class SimulatorIntegration:
     """Classe responsável pela integração entre interface e simulador."""
+
+    # Compartilhado entre instâncias: nomes criados no mesmo segundo continuam distintos
+    _exp_counter = itertools.count()
+    _exp_prefix = (None, "")
     
     def __init__(self, base_path: str = "simulador_heuristica"):
         # Derive project root from this file's location to avoid dependence on CWD
@@ -103,17 +259,145 @@ class SimulatorIntegration:
         self.base_path = (project_root / base_path).resolve()
         self.input_path = self.base_path / "input"
         self.output_path = self.base_path / "output"
-        
+        self._input_ready = False
+        self._workers = None
+        self._workers_lock = threading.Lock()
+
+    def start_workers(self, n_workers: Optional[int] = None) -> None:
+        """Inicia um pool de workers persistentes que reutilizam o simulador já importado.
+
+        Enquanto o pool estiver ativo, `run_simulator` despacha as execuções para ele em vez
+        de iniciar um novo interpretador Python por experimento.
+        """
+        with self._workers_lock:
+            if self._workers is not None:
+                return
+            # 'spawn' evita herdar o estado (threads, Streamlit) do processo principal via fork;
+            # os processos são criados sob demanda, até max_workers
+            self._workers = ProcessPoolExecutor(
+                max_workers=n_workers or os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_simulator_worker,
+                initargs=(str(self.base_path.parent),)
+            )
+
+    def stop_workers(self) -> None:
+        """Encerra o pool de workers persistentes, se houver."""
+        with self._workers_lock:
+            workers, self._workers = self._workers, None
+        if workers is not None:
+            workers.shutdown(wait=True)
+
+    def run_simulator(
+        self,
+        experiment_name: str,
+        draw: bool = False,
+        scenario_seed: Optional[int] = None,
+        simulation_seed: Optional[int] = None
+    ) -> subprocess.CompletedProcess:
+        """Executa o simulador nos workers persistentes, ou via CLI quando o pool não foi iniciado.
+
+        Execuções bem-sucedidas são registradas em output/metrics_index.jsonl.
+        """
+        if self._workers is None:
+            proc = self.run_simulator_cli(experiment_name, draw, scenario_seed, simulation_seed)
+        else:
+            rc, stdout, stderr = self._workers.submit(
+                _run_simulator_in_worker, experiment_name, draw, scenario_seed, simulation_seed
+            ).result()
+            proc = subprocess.CompletedProcess([experiment_name], rc, stdout=stdout, stderr=stderr)
+        if proc.returncode == 0:
+            self._append_metrics_index(experiment_name)
+        return proc
+
+    def run_many(
+        self,
+        experiment_names: List[str],
+        draw: bool = False,
+        scenario_seed: Optional[int] = None,
+        simulation_seed: Optional[int] = None
+    ) -> List[subprocess.CompletedProcess]:
+        """Executa vários experimentos independentes de uma vez, um por worker livre.
+
+        Com o pool persistente ativo todos são submetidos antes de aguardar o primeiro; sem ele,
+        recorre a run_simulator_cli_batch. Os resultados seguem a ordem de `experiment_names`.
+        """
+        if self._workers is None:
+            return self.run_simulator_cli_batch(
+                [(name, scenario_seed, simulation_seed) for name in experiment_names], draw
+            )
+        futures = [
+            self._workers.submit(_run_simulator_in_worker, name, draw, scenario_seed, simulation_seed)
+            for name in experiment_names
+        ]
+        results = []
+        for name, future in zip(experiment_names, futures):
+            rc, stdout, stderr = future.result()
+            if rc == 0:
+                self._append_metrics_index(name)
+            results.append(subprocess.CompletedProcess([name], rc, stdout=stdout, stderr=stderr))
+        return results
+
+    def record_metrics(self, experiment_name: str, metrics: Dict) -> None:
+        """Grava output/<exp>/metrics.json sem executar o simulador e o registra no índice.
+
+        Usado para avaliações respondidas pelo cache do NSGA-II, que assim aparecem na
+        agregação como as demais.
+        """
+        out_dir = self.output_path / experiment_name
+        out_dir.mkdir(parents=True, exist_ok=True)
+        tmp = out_dir / "metrics.json.tmp"
+        tmp.write_bytes(json_utils.dumps(metrics))
+        tmp.replace(out_dir / "metrics.json")
+        self._append_metrics_index(experiment_name)
+
+    def _append_metrics_index(self, experiment_name: str) -> None:
+        """Acrescenta as métricas do experimento como uma linha JSON em output/metrics_index.jsonl.
+
+        A escrita usa O_APPEND em uma única chamada, atômica em POSIX, de modo que execuções
+        concorrentes não intercalam linhas. Leitores consomem apenas o trecho novo do arquivo.
+        """
+        # Mesmos campos e chaves aceitas da varredura de NSGAIntegration._scan_metrics
+        from .nsga_integration import _load_metric
+        metrics_file = self.output_path / experiment_name / "metrics.json"
+        item = _load_metric(metrics_file)
+        if item is None:
+            logger.warning("Falha ao registrar métricas de %s: %s ilegível", experiment_name, metrics_file)
+            return
+        name, path, d, nd, it = item
+        line = json.dumps({
+            'eval': name,
+            'path': path,
+            'distancia_total': d,
+            'num_doors': nd,
+            'iterations': it
+        }) + "\n"
+        try:
+            fd = os.open(self.output_path / "metrics_index.jsonl", os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode('utf-8'))
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.warning("Falha ao registrar métricas de %s: %s", experiment_name, e)
+
     def prepare_experiment_from_uploads(
         self, 
         experiment_name: str, 
         map_file_path: Path, 
         individuals_file_path: Path
     ) -> Path:
+        # input/ é criado (com os diretórios pais) uma única vez; depois basta criar a folha
+        if not self._input_ready:
+            self.input_path.mkdir(parents=True, exist_ok=True)
+            self._input_ready = True
         in_dir = self.input_path / experiment_name
-        in_dir.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(map_file_path, in_dir / "map.txt")
-        shutil.copy2(individuals_file_path, in_dir / "individuals.json")
+        try:
+            os.mkdir(in_dir)
+        except FileExistsError:
+            pass
+        _fast_copy(map_file_path, in_dir / "map.txt")
+        _fast_copy(individuals_file_path, in_dir / "individuals.json")
         return in_dir
     
     def run_simulator_cli(
@@ -123,6 +407,10 @@ class SimulatorIntegration:
         scenario_seed: Optional[int] = None, 
         simulation_seed: Optional[int] = None
     ) -> subprocess.CompletedProcess:
+        """Executa o simulador em um novo interpretador, registrando a saída em output/<exp>/simulator.log.
+
+        O CompletedProcess retornado traz o final do log em `stdout` e o caminho em `log_path`.
+        """
         cmd = [sys.executable, "-m", "simulador_heuristica.simulator.main", "-e", experiment_name]
         if draw:
             cmd.append("-d")
@@ -132,94 +420,256 @@ class SimulatorIntegration:
             cmd += ["-s", str(simulation_seed)]
         # Execute from project root so 'simulador_heuristica' package is importable with -m
         project_root = self.base_path.parent
-        return subprocess.run(cmd, cwd=project_root, capture_output=True, text=True, check=False)
+        # A saída (stdout + stderr) vai direto para output/<exp>/simulator.log, sem acumular em memória;
+        # o CompletedProcess traz apenas o final do log, onde o simulador imprime o resumo
+        log_path = self.output_path / experiment_name / "simulator.log"
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, "wb", buffering=1 << 16) as log_file:
+            rc = subprocess.Popen(cmd, cwd=project_root, stdout=log_file, stderr=subprocess.STDOUT).wait()
+        proc = subprocess.CompletedProcess(cmd, rc, stdout=_read_log_tail(log_path), stderr="")
+        proc.log_path = log_path
+        return proc
+
+    def run_simulator_cli_batch(
+        self,
+        experiments: List[Tuple[str, Optional[int], Optional[int]]],
+        draw: bool = False,
+        max_workers: Optional[int] = None
+    ) -> List[subprocess.CompletedProcess]:
+        """Executa vários experimentos (experiment_name, scenario_seed, simulation_seed) via CLI em paralelo.
+
+        Cada execução já é um subprocesso, então threads bastam para ocupar os núcleos.
+        Os resultados são devolvidos na mesma ordem de `experiments`.
+        """
+        if not experiments:
+            return []
+        workers = min(len(experiments), max_workers or os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = [
+                ex.submit(self.run_simulator_cli, name, draw, scenario_seed, simulation_seed)
+                for name, scenario_seed, simulation_seed in experiments
+            ]
+            return [f.result() for f in futures]
     
     def read_results(self, experiment_name: str) -> Dict:
         out_dir = self.output_path / experiment_name
         if not out_dir.exists():
             return {"error": "Diretório de saída não encontrado"}
-        report_html = next(out_dir.glob("*.html"), None)
-        frames = sorted(out_dir.glob("*.png"))
-        metrics_files = list(out_dir.glob("*.json")) + list(out_dir.glob("*.txt"))
-        return {"report": report_html, "frames": frames, "metrics": metrics_files, "directory": out_dir}
+        # Uma única leitura do diretório, classificando as entradas pela extensão
+        report_html = None
+        frames, json_files, txt_files = [], [], []
+        with os.scandir(out_dir) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                ext = entry.name.rpartition('.')[2]
+                if ext == 'png':
+                    # frames ficam como str: ordenar str é mais barato que ordenar Path
+                    frames.append(entry.path)
+                elif ext == 'json':
+                    json_files.append(Path(entry.path))
+                elif ext == 'txt':
+                    txt_files.append(Path(entry.path))
+                elif ext == 'html' and report_html is None:
+                    report_html = Path(entry.path)
+        frames.sort()
+        frames = [Path(p) for p in frames]
+        return {"report": report_html, "frames": frames, "metrics": json_files + txt_files, "directory": out_dir}
     
     def create_experiment_name(self) -> str:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        return f"exp_{timestamp}"
+        """Gera um nome de experimento único no processo: timestamp legível + contador monotônico.
+
+        O prefixo com a data só é reformatado quando o segundo do relógio muda.
+        """
+        second = int(time.time())
+        cached_second, prefix = SimulatorIntegration._exp_prefix
+        if second != cached_second:
+            prefix = time.strftime("exp_%Y%m%d_%H%M%S_", time.localtime(second))
+            SimulatorIntegration._exp_prefix = (second, prefix)
+        return f"{prefix}{next(self._exp_counter):04d}"
     
     def validate_upload_files(self, map_file: Path, individuals_file: Path) -> Tuple[bool, str]:
         if not map_file.exists():
             return False, "Arquivo de mapa não encontrado"
         if not individuals_file.exists():
             return False, "Arquivo de indivíduos não encontrado"
+        # Verificação rápida sem parsear o arquivo: um objeto JSON ({...}) que contém a chave.
+        # Só quando o formato não é o esperado o arquivo é parseado, para a mensagem correta.
+        with open(individuals_file, 'rb') as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if mm[:64].lstrip()[:1] == b'{' and mm[-64:].rstrip()[-1:] == b'}':
+                        if mm.find(b'"caracterizations"') == -1:
+                            return False, "Arquivo de indivíduos deve conter 'caracterizations'"
+                        return True, "Arquivos válidos"
+            except ValueError:
+                # arquivo vazio: mmap não aceita tamanho zero
+                pass
         try:
-            with open(individuals_file, 'r') as f:
-                data = json.load(f)
-                if 'caracterizations' not in data:
-                    return False, "Arquivo de indivíduos deve conter 'caracterizations'"
-        except json.JSONDecodeError:
+            data = json_utils.loads(individuals_file.read_bytes())
+            if 'caracterizations' not in data:
+                return False, "Arquivo de indivíduos deve conter 'caracterizations'"
+        except ValueError:
+            # json.JSONDecodeError, orjson.JSONDecodeError e bytes que não são UTF-8
             return False, "Arquivo de indivíduos deve ser um JSON válido"
         return True, "Arquivos válidos"
 
 
 # ======= DATABASE INTEGRATION =======
+# Tabelas e índices criados por _SCHEMA_SQL; _ensure_schema só roda o script se faltar algum
+_SCHEMA_OBJECTS = ('Mapa', 'Simulacao', 'Resultado', 'Preset', 'idx_sim_mapa_iddesc', 'idx_res_simid')
+
+_SCHEMA_SQL = '''
+CREATE TABLE IF NOT EXISTS Mapa (
+    id_mapa INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL UNIQUE,
+    arquivo_map TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS Simulacao (
+    id_simulacao INTEGER PRIMARY KEY,
+    id_mapa INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    algoritmo TEXT NOT NULL,
+    config_pedestres_json TEXT NOT NULL,
+    pos_pedestres_json TEXT,
+    config_simulacao_json TEXT NOT NULL,
+    cli_config_json TEXT NOT NULL,
+    nsga_config_json TEXT,
+    executada INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (id_mapa) REFERENCES Mapa(id_mapa) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS Resultado (
+    id_resultado INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_simulacao INTEGER NOT NULL,
+    frente_pareto_json TEXT NOT NULL,
+    FOREIGN KEY (id_simulacao) REFERENCES Simulacao(id_simulacao) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS Preset (
+    id_preset INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    parametros_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sim_mapa_iddesc ON Simulacao(id_mapa, id_simulacao DESC);
+CREATE INDEX IF NOT EXISTS idx_res_simid ON Resultado(id_simulacao);
+'''
+
+# Instruções reutilizadas a cada chamada; o texto idêntico permite ao sqlite3 reaproveitar
+# o statement já compilado do cache da conexão
+_INSERT_SIM_SQL = """
+    INSERT OR REPLACE INTO Simulacao
+    (id_simulacao, id_mapa, nome, algoritmo, config_pedestres_json,
+     pos_pedestres_json, config_simulacao_json, cli_config_json,
+     nsga_config_json, executada)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_INSERT_SIM_AUTO_SQL = """
+    INSERT INTO Simulacao
+    (id_mapa, nome, algoritmo, config_pedestres_json,
+     pos_pedestres_json, config_simulacao_json, cli_config_json,
+     nsga_config_json, executada)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SELECT_SIMS_SQL = """
+    SELECT s.id_simulacao, s.nome, m.nome as mapa_nome, s.algoritmo, s.executada
+    FROM Simulacao s
+    JOIN Mapa m ON s.id_mapa = m.id_mapa
+    %s
+    ORDER BY s.id_simulacao DESC
+"""
+_INSERT_MAP_SQL = "INSERT INTO Mapa (nome, arquivo_map) VALUES (?, ?)"
+_SELECT_MAP_ID_SQL = "SELECT id_mapa FROM Mapa WHERE nome = ?"
+_UPDATE_MAP_SQL = "UPDATE Mapa SET arquivo_map = ? WHERE nome = ?"
+# UPSERT ... RETURNING requer SQLite >= 3.35; versões anteriores usam INSERT + SELECT
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+# UPSERT sem RETURNING (SQLite >= 3.24), usado pelo executemany de save_maps_bulk
+_UPSERT_MAPS_SQL = (
+    "INSERT INTO Mapa (nome, arquivo_map) VALUES (?, ?) "
+    "ON CONFLICT(nome) DO UPDATE SET arquivo_map = excluded.arquivo_map"
+    if sqlite3.sqlite_version_info >= (3, 24, 0)
+    else "INSERT OR IGNORE INTO Mapa (nome, arquivo_map) VALUES (?, ?)"
+)
+_UPSERT_MAP_SQL = """
+    INSERT INTO Mapa (nome, arquivo_map) VALUES (?, ?)
+    ON CONFLICT(nome) DO UPDATE SET arquivo_map = excluded.arquivo_map
+    RETURNING id_mapa
+"""
+_INSERT_RESULT_SQL = "INSERT INTO Resultado (id_simulacao, frente_pareto_json) VALUES (?, ?)"
+
+# Instâncias vivas de DatabaseIntegration; suas conexões são fechadas no encerramento do processo
+_db_instances = weakref.WeakSet()
+
+
+@atexit.register
+def _close_db_connections():
+    for db in list(_db_instances):
+        db.close()
+
+
 class DatabaseIntegration:
     """Classe responsável pela integração com o banco de dados."""
     
     def __init__(self, db_path: str = "simulador.db"):
         self.db_path = db_path
+        # Uma única conexão persistente, compartilhada pelas threads (ver _conn). O lock é
+        # reentrante porque transaction() o mantém enquanto os métodos de gravação o tomam.
+        self._con = None
+        self._lock = threading.RLock()
+        _db_instances.add(self)
         # Ensure DB schema exists (useful when DB file is present but empty)
         try:
             self._ensure_schema()
         except Exception as e:
             print(f"Warning: failed to ensure DB schema: {e}")
 
+    def _conn(self) -> sqlite3.Connection:
+        """Retorna a conexão da instância, criando-a na primeira chamada.
+
+        A conexão é compartilhada entre threads (check_same_thread=False); quem a usa
+        deve segurar self._lock. Fica em modo autocommit, com WAL, synchronous=NORMAL,
+        temporários em memória e ~20 MB de cache de páginas; os PRAGMAs são aplicados uma
+        única vez. As linhas são sqlite3.Row, acessíveis por índice ou pelo nome da coluna.
+        """
+        with self._lock:
+            if self._con is None:
+                con = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+                con.execute('PRAGMA journal_mode=WAL')
+                con.execute('PRAGMA synchronous=NORMAL')
+                con.execute('PRAGMA temp_store=MEMORY')
+                con.execute('PRAGMA cache_size=-20000')
+                con.execute('PRAGMA foreign_keys=ON')
+                con.row_factory = sqlite3.Row
+                self._con = con
+            return self._con
+
+    def close(self):
+        """Fecha a conexão da instância.
+
+        A instância continua utilizável: a próxima chamada reabre a conexão.
+        Chamado automaticamente no encerramento do processo.
+        """
+        with self._lock:
+            con, self._con = self._con, None
+        if con is not None:
+            try:
+                con.close()
+            except Exception:
+                pass
+
     def _ensure_schema(self):
-        """Create required tables if they don't exist. Idempotent."""
-        con = sqlite3.connect(self.db_path)
-        cur = con.cursor()
-        # enable foreign keys
-        cur.execute('PRAGMA foreign_keys = ON')
-        cur.execute('''
-        CREATE TABLE IF NOT EXISTS Mapa (
-            id_mapa INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL UNIQUE,
-            arquivo_map TEXT NOT NULL
-        )
-        ''')
-        cur.execute('''
-        CREATE TABLE IF NOT EXISTS Simulacao (
-            id_simulacao INTEGER PRIMARY KEY,
-            id_mapa INTEGER NOT NULL,
-            nome TEXT NOT NULL,
-            algoritmo TEXT NOT NULL,
-            config_pedestres_json TEXT NOT NULL,
-            pos_pedestres_json TEXT,
-            config_simulacao_json TEXT NOT NULL,
-            cli_config_json TEXT NOT NULL,
-            nsga_config_json TEXT,
-            executada INTEGER NOT NULL DEFAULT 0,
-            FOREIGN KEY (id_mapa) REFERENCES Mapa(id_mapa) ON DELETE CASCADE
-        )
-        ''')
-        cur.execute('''
-        CREATE TABLE IF NOT EXISTS Resultado (
-            id_resultado INTEGER PRIMARY KEY,
-            id_simulacao INTEGER NOT NULL,
-            frente_pareto_json TEXT NOT NULL,
-            FOREIGN KEY (id_simulacao) REFERENCES Simulacao(id_simulacao) ON DELETE CASCADE
-        )
-        ''')
-        cur.execute('''
-        CREATE TABLE IF NOT EXISTS Preset (
-            id_preset INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            tipo TEXT NOT NULL,
-            parametros_json TEXT NOT NULL
-        )
-        ''')
-        con.commit()
-        con.close()
+        """Create required tables and indexes if they don't exist. Idempotent.
+
+        When all of them are already present the DDL script is skipped entirely.
+        """
+        with self._lock:
+            cur = self._conn().cursor()
+            existing = cur.execute(
+                "SELECT count(*) FROM sqlite_master WHERE name IN (%s)"
+                % ",".join("?" * len(_SCHEMA_OBJECTS)), _SCHEMA_OBJECTS
+            ).fetchone()[0]
+            if existing == len(_SCHEMA_OBJECTS):
+                return
+            cur.executescript(_SCHEMA_SQL)
     
     def save_simulation(
         self,
@@ -234,75 +684,92 @@ class DatabaseIntegration:
         nsga_config_json: Optional[str] = None,
         executada: int = 0
     ) -> bool:
+        row = (id_mapa, nome, algoritmo, config_pedestres_json, pos_pedestres_json,
+               config_simulacao_json, cli_config_json, nsga_config_json, int(executada))
         try:
-            con = sqlite3.connect(self.db_path)
-            # ensure foreign key constraints are enabled
-            con.execute('PRAGMA foreign_keys = ON')
-            cur = con.cursor()
-            # If an id_simulacao is provided, try to insert using it.
-            if id_simulacao and int(id_simulacao) > 0:
-                try:
-                    cur.execute("""
-                        INSERT OR REPLACE INTO Simulacao 
-                        (id_simulacao, id_mapa, nome, algoritmo, config_pedestres_json, 
-                         pos_pedestres_json, config_simulacao_json, cli_config_json, 
-                         nsga_config_json, executada)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (int(id_simulacao), id_mapa, nome, algoritmo, config_pedestres_json,
-                          pos_pedestres_json, config_simulacao_json, cli_config_json,
-                          nsga_config_json, int(executada)))
-                except Exception as e:
-                    # fallback: insert without id (let DB assign primary key)
-                    print(f"Warning: failed to insert with provided id_simulacao={id_simulacao}: {e}. Falling back to autoinsert.")
-                    cur.execute("""
-                        INSERT INTO Simulacao 
-                        (id_mapa, nome, algoritmo, config_pedestres_json, 
-                         pos_pedestres_json, config_simulacao_json, cli_config_json, 
-                         nsga_config_json, executada)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (id_mapa, nome, algoritmo, config_pedestres_json,
-                          pos_pedestres_json, config_simulacao_json, cli_config_json,
-                          nsga_config_json, int(executada)))
-            else:
-                # No id provided: let the DB assign one
-                cur.execute("""
-                    INSERT INTO Simulacao 
-                    (id_mapa, nome, algoritmo, config_pedestres_json, 
-                     pos_pedestres_json, config_simulacao_json, cli_config_json, 
-                     nsga_config_json, executada)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (id_mapa, nome, algoritmo, config_pedestres_json,
-                      pos_pedestres_json, config_simulacao_json, cli_config_json,
-                      nsga_config_json, int(executada)))
-            con.commit()
-            con.close()
+            with self._lock:
+                # If an id_simulacao is provided, try to insert using it.
+                if id_simulacao and int(id_simulacao) > 0:
+                    try:
+                        self._executemany(_INSERT_SIM_SQL, [(int(id_simulacao),) + row])
+                    except Exception as e:
+                        # fallback: insert without id (let DB assign primary key)
+                        print(f"Warning: failed to insert with provided id_simulacao={id_simulacao}: {e}. Falling back to autoinsert.")
+                        self._conn().execute(_INSERT_SIM_AUTO_SQL, row)
+                else:
+                    # No id provided: let the DB assign one
+                    self._conn().execute(_INSERT_SIM_AUTO_SQL, row)
             return True
         except Exception as e:
             # log detailed error for debugging
             print(f"Erro ao salvar simulação (id_simulacao={id_simulacao}, id_mapa={id_mapa}, nome={nome}): {e}")
             return False
+
+    def save_simulations_bulk(self, rows: List[tuple]) -> bool:
+        """Grava várias simulações em uma única transação (um único commit/fsync).
+
+        Cada linha segue a ordem de colunas de _INSERT_SIM_SQL, começando por id_simulacao.
+        Fora de transaction() retorna False em caso de erro; dentro dela a exceção é propagada.
+        """
+        try:
+            self._executemany(_INSERT_SIM_SQL, rows)
+            return True
+        except Exception as e:
+            if self._conn().in_transaction:
+                # dentro de transaction(): o erro precisa chegar ao bloco para desfazer tudo
+                raise
+            print(f"Erro ao salvar simulações em lote ({len(rows)} linhas): {e}")
+            return False
+
+    def save_maps_bulk(self, rows: List[Tuple[str, str]]) -> bool:
+        """Grava vários mapas (nome, arquivo_map) em uma única transação.
+
+        Nomes já existentes têm o arquivo_map atualizado, como em save_map. Fora de
+        transaction() retorna False em caso de erro; dentro dela a exceção é propagada.
+        """
+        try:
+            self._executemany(_UPSERT_MAPS_SQL, rows)
+            return True
+        except Exception as e:
+            if self._conn().in_transaction:
+                # dentro de transaction(): o erro precisa chegar ao bloco para desfazer tudo
+                raise
+            print(f"Erro ao salvar mapas em lote ({len(rows)} linhas): {e}")
+            return False
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Agrupa várias operações (ex.: save_maps_bulk + save_simulations_bulk) em um único commit.
+
+        Em caso de exceção a transação inteira é desfeita. O lock da conexão fica com a
+        thread até o fim do bloco, para que gravações de outras threads não entrem nela.
+        """
+        with self._lock:
+            con = self._conn()
+            con.execute('BEGIN')
+            try:
+                yield con
+            except BaseException:
+                con.execute('ROLLBACK')
+                raise
+            con.execute('COMMIT')
+
+    def _executemany(self, sql: str, rows: List[tuple]) -> None:
+        """Executa sql para todas as linhas dentro de BEGIN...COMMIT, com rollback em caso de erro.
+
+        Dentro de transaction() as linhas entram na transação já aberta.
+        """
+        with self._lock:
+            con = self._conn()
+            if con.in_transaction:
+                con.executemany(sql, rows)
+                return
+            with self.transaction():
+                con.executemany(sql, rows)
     
     def get_simulations(self) -> List[Dict]:
         try:
-            con = sqlite3.connect(self.db_path)
-            cur = con.cursor()
-            cur.execute("""
-                SELECT s.id_simulacao, s.nome, m.nome as mapa_nome, s.algoritmo, s.executada
-                FROM Simulacao s
-                JOIN Mapa m ON s.id_mapa = m.id_mapa
-                ORDER BY s.id_simulacao DESC
-            """)
-            results = []
-            for row in cur.fetchall():
-                results.append({
-                    "id": row[0],
-                    "nome": row[1],
-                    "mapa": row[2],
-                    "algoritmo": row[3],
-                    "simulado": "SIM" if row[4] == 1 else "NÃO"
-                })
-            con.close()
-            return results
+            return list(self.get_simulations_iter())
         except Exception as e:
             print(f"Erro ao recuperar simulações: {e}")
             return []
@@ -310,45 +777,52 @@ class DatabaseIntegration:
     def get_simulations_by_map(self, mapa_nome: str) -> List[Dict]:
         """Retorna todas as simulações associadas a um mapa (pelo nome do mapa)."""
         try:
-            con = sqlite3.connect(self.db_path)
-            cur = con.cursor()
-            cur.execute("""
-                SELECT s.id_simulacao, s.nome, m.nome as mapa_nome, s.algoritmo, s.executada
-                FROM Simulacao s
-                JOIN Mapa m ON s.id_mapa = m.id_mapa
-                WHERE m.nome = ?
-                ORDER BY s.id_simulacao DESC
-            """, (mapa_nome,))
-            results = []
-            for row in cur.fetchall():
-                results.append({
-                    "id": row[0],
-                    "nome": row[1],
-                    "mapa": row[2],
-                    "algoritmo": row[3],
-                    "simulado": "SIM" if row[4] == 1 else "NÃO"
-                })
-            con.close()
-            return results
+            return list(self.get_simulations_iter(mapa_nome))
         except Exception as e:
             print(f"Erro ao recuperar simulações por mapa: {e}")
             return []
 
+    def get_simulations_iter(self, mapa_nome: Optional[str] = None) -> Iterator[Dict]:
+        """Percorre as simulações (opcionalmente de um mapa) em lotes de fetchmany.
+
+        As linhas são lidas do cursor sob demanda, de modo que o chamador pode exibir as
+        primeiras simulações sem materializar a lista inteira. O lock é tomado a cada lote,
+        não durante toda a iteração.
+        """
+        with self._lock:
+            cur = self._conn().cursor()
+            if mapa_nome is None:
+                cur.execute(_SELECT_SIMS_SQL % "")
+            else:
+                cur.execute(_SELECT_SIMS_SQL % "WHERE m.nome = ?", (mapa_nome,))
+        while True:
+            with self._lock:
+                rows = cur.fetchmany(256)
+            if not rows:
+                break
+            for row in rows:
+                yield {
+                    "id": row["id_simulacao"],
+                    "nome": row["nome"],
+                    "mapa": row["mapa_nome"],
+                    "algoritmo": row["algoritmo"],
+                    "simulado": "SIM" if row["executada"] == 1 else "NÃO"
+                }
+
     def get_simulation(self, id_simulacao: int) -> Optional[Dict]:
         """Retorna os detalhes de uma simulação pelo seu id_simulacao."""
         try:
-            con = sqlite3.connect(self.db_path)
-            cur = con.cursor()
-            cur.execute("""
-                SELECT s.id_simulacao, s.nome, s.id_mapa, m.nome as mapa_nome, s.algoritmo,
-                       s.config_pedestres_json, s.pos_pedestres_json, s.config_simulacao_json,
-                       s.cli_config_json, s.nsga_config_json, s.executada
-                FROM Simulacao s
-                JOIN Mapa m ON s.id_mapa = m.id_mapa
-                WHERE s.id_simulacao = ?
-            """, (id_simulacao,))
-            row = cur.fetchone()
-            con.close()
+            with self._lock:
+                cur = self._conn().cursor()
+                cur.execute("""
+                    SELECT s.id_simulacao, s.nome, s.id_mapa, m.nome as mapa_nome, s.algoritmo,
+                           s.config_pedestres_json, s.pos_pedestres_json, s.config_simulacao_json,
+                           s.cli_config_json, s.nsga_config_json, s.executada
+                    FROM Simulacao s
+                    JOIN Mapa m ON s.id_mapa = m.id_mapa
+                    WHERE s.id_simulacao = ?
+                """, (id_simulacao,))
+                row = cur.fetchone()
             if not row:
                 return None
             return {
@@ -370,39 +844,31 @@ class DatabaseIntegration:
     
     def save_map(self, nome: str, arquivo_map: str) -> int:
         try:
-            con = sqlite3.connect(self.db_path)
-            cur = con.cursor()
-            # Try to insert, but if the name already exists (unique), retrieve the existing id
-            try:
-                cur.execute("INSERT INTO Mapa (nome, arquivo_map) VALUES (?, ?)", (nome, arquivo_map))
-                map_id = cur.lastrowid
-            except sqlite3.IntegrityError:
-                # nome is unique - retrieve existing id
-                cur.execute("SELECT id_mapa FROM Mapa WHERE nome = ?", (nome,))
-                row = cur.fetchone()
-                map_id = row[0] if row else -1
-            con.commit()
-            con.close()
-            return map_id
+            with self._lock:
+                cur = self._conn().cursor()
+                if _HAS_RETURNING:
+                    # Single statement: insert, or refresh arquivo_map of the existing name, and get the id
+                    cur.execute(_UPSERT_MAP_SQL, (nome, arquivo_map))
+                    return cur.fetchone()[0]
+                # Try to insert, but if the name already exists (unique), refresh it and retrieve the existing id
+                try:
+                    cur.execute(_INSERT_MAP_SQL, (nome, arquivo_map))
+                    map_id = cur.lastrowid
+                except sqlite3.IntegrityError:
+                    # nome is unique - same result as the UPSERT above
+                    cur.execute(_UPDATE_MAP_SQL, (arquivo_map, nome))
+                    cur.execute(_SELECT_MAP_ID_SQL, (nome,))
+                    row = cur.fetchone()
+                    map_id = row[0] if row else -1
+                return map_id
         except Exception as e:
             print(f"Erro ao salvar mapa: {e}")
             return -1
     def save_result(self, id_simulacao: int, result_json: str) -> bool:
         """Generic saver for any simulation result JSON into Resultado."""
         try:
-            con = sqlite3.connect(self.db_path)
-            cur = con.cursor()
-            import time
-            id_resultado = int(time.time())
-            cur.execute(
-                """
-                INSERT OR REPLACE INTO Resultado (id_resultado, id_simulacao, frente_pareto_json)
-                VALUES (?, ?, ?)
-                """,
-                (id_resultado, id_simulacao, result_json)
-            )
-            con.commit()
-            con.close()
+            with self._lock:
+                self._conn().execute(_INSERT_RESULT_SQL, (id_simulacao, result_json))
             return True
         except Exception as e:
             print(f"Erro ao salvar resultado: {e}")
@@ -426,24 +892,12 @@ class DatabaseIntegration:
     ) -> Optional[int]:
         """Insert a simulation without requiring an id_simulacao and return the new id on success."""
         try:
-            con = sqlite3.connect(self.db_path)
-            con.execute('PRAGMA foreign_keys = ON')
-            cur = con.cursor()
-            cur.execute("""
-                INSERT INTO Simulacao 
-                (id_mapa, nome, algoritmo, config_pedestres_json, 
-                 pos_pedestres_json, config_simulacao_json, cli_config_json, 
-                 nsga_config_json, executada)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (id_mapa, nome, algoritmo, config_pedestres_json,
-                  pos_pedestres_json, config_simulacao_json, cli_config_json,
-                  nsga_config_json, int(executada)))
-            con.commit()
-            # get the last inserted id
-            cur.execute('SELECT last_insert_rowid()')
-            row = cur.fetchone()
-            con.close()
-            return row[0] if row else None
+            with self._lock:
+                cur = self._conn().cursor()
+                cur.execute(_INSERT_SIM_AUTO_SQL, (id_mapa, nome, algoritmo, config_pedestres_json,
+                      pos_pedestres_json, config_simulacao_json, cli_config_json,
+                      nsga_config_json, int(executada)))
+                return cur.lastrowid
         except Exception as e:
             print(f"Erro ao criar simulação sem id: {e}")
             return None
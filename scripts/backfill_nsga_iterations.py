@@ -6,9 +6,17 @@ produced by NSGA aggregation under simulador_heuristica/output/<sim_name>/metric
 Usage: python scripts/backfill_nsga_iterations.py <uploads/nsga_ii/results_...json>
 """
 import sys
-import json
+import math
+from bisect import bisect_left
+from collections import defaultdict
 from pathlib import Path
 
+# orjson-backed (with stdlib fallback) JSON helpers shared with the interface services
+project_root = Path(__file__).resolve().parents[1]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+from interface.services import json_utils
+
 if len(sys.argv) < 2:
     print("Usage: backfill_nsga_iterations.py <results_file>")
     sys.exit(2)
@@ -32,14 +40,19 @@ if not consolidated_path.exists():
     sys.exit(0)
 
 try:
-    cons = json.loads(consolidated_path.read_text())
-    evs = cons.get('evaluations', [])
+    cons = json_utils.loads(consolidated_path.read_bytes())
+    if 'evaluations' not in cons and cons.get('parquet'):
+        # metrics_format 'parquet': evaluations live next to the summary
+        import pyarrow.parquet as pq
+        evs = pq.read_table(consolidated_path.parent / cons['parquet']).to_pylist()
+    else:
+        evs = cons.get('evaluations', [])
 except Exception as e:
     print(f"Failed to read consolidated metrics: {e}")
     sys.exit(1)
 
 try:
-    raw_results = json.loads(results_path.read_text())
+    raw_results = json_utils.loads(results_path.read_bytes())
 except Exception as e:
     print(f"Failed to read results file: {e}")
     sys.exit(1)
@@ -56,47 +69,108 @@ def _eval_distance(e):
                     return None
     return None
 
+def _build_eval_index(evs):
+    """Index evaluations by num_doors so each result is matched by bisect instead of a full scan.
+
+    Returns (by_num, first_any, first_no_dist): per num_doors, the (distance, position) pairs
+    sorted by distance, the position of the first evaluation, and the position of the first
+    evaluation without a distance. Positions keep the original list order as tie-breaker.
+    """
+    by_num = defaultdict(list)
+    first_any = {}
+    first_no_dist = {}
+    for pos, e in enumerate(evs):
+        try:
+            num = int(e.get('num_doors'))
+        except Exception:
+            continue
+        first_any.setdefault(num, pos)
+        d = _eval_distance(e)
+        if d is None:
+            first_no_dist.setdefault(num, pos)
+        elif not math.isnan(d):
+            by_num[num].append((d, pos))
+    for bucket in by_num.values():
+        bucket.sort()
+    return by_num, first_any, first_no_dist
+
+
+def _match_eval(r_num, r_dist, by_num, first_any, first_no_dist):
+    """First evaluation (in file order) with the same num_doors and a distance within 0.1%,
+    or without a distance to compare; any evaluation with that num_doors if r_dist is unknown."""
+    try:
+        num = int(r_num)
+    except Exception:
+        return None
+    if num not in first_any:
+        return None
+    if r_dist is None:
+        return first_any[num]
+    tol = max(1e-6, 0.001 * abs(r_dist))
+    best = first_no_dist.get(num)
+    bucket = by_num.get(num, [])
+    i = bisect_left(bucket, (r_dist - 2 * tol, -1))
+    while i < len(bucket) and bucket[i][0] <= r_dist + 2 * tol:
+        d, pos = bucket[i]
+        if abs(d - r_dist) <= tol and (best is None or pos < best):
+            best = pos
+        i += 1
+    return best
+
+
+def _eval_iterations(e):
+    it = e.get('iterations') or e.get('qtd_iteracoes') or e.get('iters') or e.get('tempo_total')
+    if it is None:
+        return None
+    try:
+        return int(it)
+    except Exception:
+        return it
+
+
+# Everything derived from the evaluations is computed once: the matching index, the
+# iterations of each evaluation, and a memo of (num_doors, distance) -> iterations for
+# results that repeat the same objectives
+by_num, first_any, first_no_dist = _build_eval_index(evs)
+eval_iters = [_eval_iterations(e) for e in evs]
+matched = {}
+
 changed = False
 for r in raw_results:
-    if r.get('iterations') is None:
-        r_num = r.get('num_doors')
+    if r.get('iterations') is not None:
+        continue
+    r_num = r.get('num_doors')
+    r_dist = None
+    try:
+        if isinstance(r.get('objectives'), (list,tuple)) and len(r.get('objectives')) >= 2:
+            r_dist = float(r.get('objectives')[1])
+    except Exception:
         r_dist = None
-        try:
-            if isinstance(r.get('objectives'), (list,tuple)) and len(r.get('objectives')) >= 2:
-                r_dist = float(r.get('objectives')[1])
-        except Exception:
-            r_dist = None
 
+    key = (r_num, r_dist)
+    try:
+        matched_iter = matched[key]
+    except KeyError:
+        pos = _match_eval(r_num, r_dist, by_num, first_any, first_no_dist)
+        matched_iter = eval_iters[pos] if pos is not None else None
+        matched[key] = matched_iter
+    except TypeError:
+        # unhashable num_doors (e.g. a list): never matches, as int() would fail
         matched_iter = None
-        for e in evs:
-            try:
-                ev_num = e.get('num_doors')
-                ev_dist = _eval_distance(e)
-                if ev_num is not None and r_num is not None and int(ev_num) == int(r_num):
-                    if r_dist is not None and ev_dist is not None:
-                        try:
-                            if abs(float(ev_dist) - float(r_dist)) <= max(1e-6, 0.001 * abs(float(r_dist))):
-                                matched_iter = e.get('iterations') or e.get('qtd_iteracoes') or e.get('iters') or e.get('tempo_total')
-                                break
-                        except Exception:
-                            continue
-                    else:
-                        matched_iter = e.get('iterations') or e.get('qtd_iteracoes') or e.get('iters') or e.get('tempo_total')
-                        break
-            except Exception:
-                continue
 
-        if matched_iter is not None:
-            try:
-                r['iterations'] = int(matched_iter)
-            except Exception:
-                r['iterations'] = matched_iter
-            changed = True
+    if matched_iter is not None:
+        r['iterations'] = matched_iter
+        changed = True
 
 if changed:
-    # atomic rewrite
+    # atomic rewrite, streamed one result at a time (same layout as dumping the list with indent=2)
     tmp = results_path.with_suffix('.tmp')
-    tmp.write_text(json.dumps(raw_results, indent=2))
+    with tmp.open('wb') as f:
+        f.write(b'[')
+        for i, r in enumerate(raw_results):
+            f.write(b',\n  ' if i else b'\n  ')
+            f.write(json_utils.dumps(r, indent=True).replace(b'\n', b'\n  '))
+        f.write(b'\n]' if raw_results else b']')
     tmp.replace(results_path)
     print(f"Backfilled iterations into {results_path}")
 else:
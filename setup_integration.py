@@ -24,8 +24,13 @@ def create_directories():
         "mapas"
     ]
     
-    for directory in directories:
-        Path(directory).mkdir(parents=True, exist_ok=True)
+    # Diretórios mais rasos primeiro, para que os pais comuns sejam criados uma única vez;
+    # os que já existem (execuções repetidas do script) não geram nenhuma criação
+    for directory in sorted(set(directories), key=lambda d: d.count('/')):
+        if os.path.isdir(directory):
+            print(f"✓ Diretório já existe: {directory}")
+            continue
+        os.makedirs(directory, exist_ok=True)
         print(f"✓ Diretório criado: {directory}")
 
 def initialize_database():
@@ -41,6 +46,14 @@ def initialize_database():
     except subprocess.CalledProcessError as e:
         print(f"✗ Erro ao inicializar banco de dados: {e}")
 
+def _is_importable(package):
+    """Retorna se o pacote pode ser importado (uma instalação quebrada conta como ausente)."""
+    try:
+        __import__(package)
+        return True
+    except Exception:
+        return False
+
 def check_dependencies():
     """Verifica se as dependências estão instaladas."""
     required_packages = [
@@ -52,11 +65,12 @@ def check_dependencies():
     
     missing_packages = []
     
+    # Importa um pacote por vez: imports concorrentes de dependências em comum (ex.: numpy)
+    # podem falhar com _DeadlockError
     for package in required_packages:
-        try:
-            __import__(package)
+        if _is_importable(package):
             print(f"✓ {package} instalado")
-        except ImportError:
+        else:
             missing_packages.append(package)
             print(f"✗ {package} não encontrado")
     
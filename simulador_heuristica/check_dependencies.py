@@ -8,6 +8,14 @@ Verifica se todas as dependências necessárias estão instaladas
 import sys
 import importlib
 
+def _try_import(package):
+    """Importa o pacote e retorna None, ou a exceção em caso de falha (instalação quebrada inclusive)"""
+    try:
+        importlib.import_module(package)
+        return None
+    except Exception as e:
+        return e
+
 def check_dependencies():
     """Verifica se todas as dependências estão instaladas"""
     
@@ -25,20 +33,15 @@ def check_dependencies():
     print("Verificando dependências...")
     print("-" * 50)
     
+    # Importa um pacote por vez: imports concorrentes de dependências em comum (ex.: numpy)
+    # podem falhar com _DeadlockError
     for package, description in required_packages.items():
-        try:
-            if package == 'PIL':
-                # Pillow é importado como PIL
-                importlib.import_module('PIL')
-                package_name = 'Pillow'
-            else:
-                importlib.import_module(package)
-                package_name = package
-                
+        if _try_import(package) is None:
+            # Pillow é importado como PIL
+            package_name = 'Pillow' if package == 'PIL' else package
             installed_packages.append((package_name, description))
             print(f"✅ {package_name:<15} - {description}")
-            
-        except ImportError:
+        else:
             missing_packages.append((package, description))
             print(f"❌ {package:<15} - {description} (AUSENTE)")
     
@@ -143,18 +143,18 @@ class CrowdMap(object):
 
         for i in range(self.len_row):
             for j in range(self.len_col):
-                if (self.structure_map.map[i][j] == Constants.M_WALL):
+                if (self.structure_map.map_list[i][j] == Constants.M_WALL):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_BLACK, Constants.C_BLACK)
-                elif (self.structure_map.map[i][j] == Constants.M_OBJECT):
+                elif (self.structure_map.map_list[i][j] == Constants.M_OBJECT):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_GRAY, Constants.C_GRAY)
-                elif (self.structure_map.map[i][j] == Constants.M_VOID):
+                elif (self.structure_map.map_list[i][j] == Constants.M_VOID):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_LIGHT_BLACK, Constants.C_LIGHT_BLACK)
-                elif (self.structure_map.map[i][j] == Constants.M_EMPTY):
+                elif (self.structure_map.map_list[i][j] == Constants.M_EMPTY):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_WHITE, Constants.C_BLACK)             
-                elif (self.structure_map.map[i][j] == Constants.M_DOOR):
+                elif (self.structure_map.map_list[i][j] == Constants.M_DOOR):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_RED, Constants.C_BLACK)
                 if (self.map[i][j] != 0): # If the field have an individual
-                    if (self.structure_map.map[i][j] != Constants.M_DOOR):
+                    if (self.structure_map.map_list[i][j] != Constants.M_DOOR):
                         draw.ellipse((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), self.map[i][j].color, Constants.C_BLACK) 
         
         image_name = directory + "/" + "crowd_map_" + str(iteration) + ".png"
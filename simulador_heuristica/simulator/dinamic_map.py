@@ -76,13 +76,13 @@ class DinamicMap(object):
 
         for i in range(self.len_row):
             for j in range(self.len_col):
-                if (self.structure_map.map[i][j] == Constants.M_WALL):
+                if (self.structure_map.map_list[i][j] == Constants.M_WALL):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_BLACK, Constants.C_BLACK)
-                elif (self.structure_map.map[i][j] == Constants.M_OBJECT):
+                elif (self.structure_map.map_list[i][j] == Constants.M_OBJECT):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_GRAY, Constants.C_GRAY)
-                elif (self.structure_map.map[i][j] == Constants.M_VOID):
+                elif (self.structure_map.map_list[i][j] == Constants.M_VOID):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_LIGHT_BLACK, Constants.C_LIGHT_BLACK)
-                elif (self.structure_map.map[i][j] == Constants.M_DOOR):
+                elif (self.structure_map.map_list[i][j] == Constants.M_DOOR):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_RED, Constants.C_BLACK)
                 else:
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), (255, 255 - 20 * int(self.map[i][j]), 255), Constants.C_BLACK)
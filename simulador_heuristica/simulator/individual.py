@@ -2,9 +2,60 @@
 
 from .constants import Constants
 
+import copy
+import json
 from random import randint
 from math import exp
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def load_individuals(path):
+    """Read an individuals.json file and build its individuals.
+
+    Accepts a direct array of individuals or the {'caracterizations': [...]} format. Individuals
+    of a caracterization only differ in position and simulation state, so one prototype is built
+    per caracterization and shallow-copied 'amount' times.
+
+    Parameters
+    ----------
+    path : str
+        Path of the individuals.json file.
+
+    Returns
+    -------
+    list of Individual
+        The individuals, in file order.
+    """
+    with open(path, 'rb') as json_file:
+        raw = json_file.read()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+    individuals = []
+    # Handle both formats: direct array or caracterizations object
+    if isinstance(data, list):
+        # Direct array format - each item is an individual
+        for individual_data in data:
+            # Convert color array to separate red, green, blue fields if needed
+            if 'color' in individual_data and isinstance(individual_data['color'], list):
+                individual_data['red'] = individual_data['color'][0]
+                individual_data['green'] = individual_data['color'][1]
+                individual_data['blue'] = individual_data['color'][2]
+            individuals.append(Individual(individual_data, individual_data.get('row', 0), individual_data.get('col', 0)))
+    else:
+        # Expected format with caracterizations
+        for caracterization in data['caracterizations']:
+            amount = caracterization['amount']
+            if amount <= 0:
+                continue
+            prototype = Individual(caracterization, 0, 0)
+            individuals.extend(copy.copy(prototype) for _ in range(amount))
+    return individuals
+
+
 class Individual(object):
 
     def __init__(self, configuration, col, row):
@@ -48,7 +99,7 @@ class Individual(object):
         possible_directions = []
         for i in range(len(initial_directions)):
             if static_map.field_exist(initial_directions[i]) and crowd_map.check_empty_position(initial_directions[i][0], initial_directions[i][1]):
-                if structure_map.map[initial_directions[i][0]][initial_directions[i][1]] in [Constants.M_EMPTY, Constants.M_DOOR]:
+                if structure_map.map_list[initial_directions[i][0]][initial_directions[i][1]] in [Constants.M_EMPTY, Constants.M_DOOR]:
                     possible_directions.append({"direct":i, "row":initial_directions[i][0], "col":initial_directions[i][1]})
 
         if not possible_directions:
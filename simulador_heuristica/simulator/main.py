@@ -17,7 +17,7 @@ if not logger.handlers:
     logger.addHandler(ch)
 
 from .crowd_map import CrowdMap
-from .individual import Individual
+from .individual import load_individuals
 from .dinamic_map import DinamicMap
 from .simulator import Simulator
 from .static_map import StaticMap
@@ -31,65 +31,55 @@ parser.add_argument('-d', action="store_const", dest='draw', const=True, default
 parser.add_argument('-m', action="store", dest='scenario_seed', type=int, required=False, help="Seed to generate the scenario.")
 parser.add_argument('-s', action="store", dest='simulation_seed', type=int, required=False, help="Seed to guide the simulation.")
 
-if __name__ == "__main__":
-    args = parser.parse_args()
+def run(experiment, draw=False, scenario_seed=None, simulation_seed=None):
+    """Executa uma simulação completa do experimento e persiste output/<experiment>/metrics.json.
+
+    Permite que integrações chamem o simulador no mesmo interpretador (sem `python -m`).
 
+    Returns
+    -------
+    tuple
+        (iterations, qtdDistance) retornados pelo simulador.
+    """
     # p = profile.Profile()
     # p.enable()
 
-    if args.scenario_seed:
-        random.seed(args.scenario_seed)
+    # run() may be called repeatedly in one process (persistent workers): always reseed, so a
+    # run without a scenario seed starts from fresh entropy instead of the previous run's stream
+    random.seed(scenario_seed)
 
     sep = os.path.sep
     # Base paths on this file location to avoid dependence on process CWD
     root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + sep
 
-    structure_map = StructureMap(args.experiment, root_path + "input" + sep + args.experiment + sep + "map.txt")
+    structure_map = StructureMap(experiment, root_path + "input" + sep + experiment + sep + "map.txt")
     structure_map.load_map()
 
-    wall_map = WallMap(args.experiment, structure_map)
+    wall_map = WallMap(experiment, structure_map)
     wall_map.load_map()
-    if (args.draw):
-        wall_map.draw_map(root_path + "input" + sep + args.experiment)
+    if (draw):
+        wall_map.draw_map(root_path + "input" + sep + experiment)
 
-    static_map = StaticMap(args.experiment, structure_map)
+    static_map = StaticMap(experiment, structure_map)
     static_map.load_map()
-    if (args.draw):
-        static_map.draw_map(root_path + "input" + sep + args.experiment)
+    if (draw):
+        static_map.draw_map(root_path + "input" + sep + experiment)
   
-    individuals = []
-    with open(root_path + "input" + sep + args.experiment + sep + "individuals.json", 'r') as json_file:
-        data = json.load(json_file)
-        
-        # Handle both formats: direct array or caracterizations object
-        if isinstance(data, list):
-            # Direct array format - each item is an individual
-            for individual_data in data:
-                # Convert color array to separate red, green, blue fields if needed
-                if 'color' in individual_data and isinstance(individual_data['color'], list):
-                    individual_data['red'] = individual_data['color'][0]
-                    individual_data['green'] = individual_data['color'][1]
-                    individual_data['blue'] = individual_data['color'][2]
-                individuals.append(Individual(individual_data, individual_data.get('row', 0), individual_data.get('col', 0)))
-        else:
-            # Expected format with caracterizations
-            for caracterization in data['caracterizations']:
-                for _ in range(caracterization['amount']):
-                    individuals.append(Individual(caracterization, 0, 0))
-
-    if args.simulation_seed:
-        random.seed(args.simulation_seed)      
-
-    crowd_map = CrowdMap(args.experiment, structure_map)
+    individuals = load_individuals(root_path + "input" + sep + experiment + sep + "individuals.json")
+
+    if simulation_seed is not None:
+        random.seed(simulation_seed)
+
+    crowd_map = CrowdMap(experiment, structure_map)
     crowd_map.load_map(individuals)
-    if (args.draw):
-        crowd_map.draw_map(root_path + "output" + sep + args.experiment, 0)
-    dinamic_map = DinamicMap(args.experiment, structure_map)
+    if (draw):
+        crowd_map.draw_map(root_path + "output" + sep + experiment, 0)
+    dinamic_map = DinamicMap(experiment, structure_map)
     dinamic_map.load_map()
 
     # SIMULATOR
-    directory = root_path + "output" + sep + args.experiment
-    scen = Scenario(args.experiment, args.draw, args.scenario_seed or 0, args.simulation_seed or 0)
+    directory = root_path + "output" + sep + experiment
+    scen = Scenario(experiment, draw, scenario_seed or 0, simulation_seed or 0)
     simulator = Simulator(scen)
     iterations, qtdDistance = simulator.simulate()
 
@@ -101,8 +91,8 @@ if __name__ == "__main__":
             "tempo_total": float(iterations),
             "distancia_total": float(qtdDistance),
             "algorithm": "simulator",
-            "scenario_seed": int(args.scenario_seed or 0),
-            "simulation_seed": int(args.simulation_seed or 0)
+            "scenario_seed": int(scenario_seed or 0),
+            "simulation_seed": int(simulation_seed or 0)
         }
         out_dir = Path(directory)
         out_dir.mkdir(parents=True, exist_ok=True)
@@ -115,3 +105,9 @@ if __name__ == "__main__":
         logger.exception("failed to write metrics.json")
     # p.disable()
     # pstats.Stats(p).sort_stats('cumulative').print_stats(30)
+    return iterations, qtdDistance
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    run(args.experiment, args.draw, args.scenario_seed, args.simulation_seed)
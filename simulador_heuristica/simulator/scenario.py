@@ -1,6 +1,6 @@
 
 from .crowd_map import CrowdMap
-from .individual import Individual
+from .individual import load_individuals
 from .dinamic_map import DinamicMap
 from .simulator import Simulator
 from .static_map import StaticMap
@@ -9,7 +9,6 @@ from .wall_map import WallMap
 
 import random
 import os
-import json
 
 class Scenario(object):
 
@@ -71,21 +70,7 @@ class Scenario(object):
 
 
     def load_individuals(self):
-        self.individuals = []
-        with open(self.root_path + "input" + self.sep + self.directory + self.sep + "individuals.json", 'r') as json_file:
-            data = json.load(json_file)
-            # Support both formats
-            if isinstance(data, list):
-                for individual_data in data:
-                    if 'color' in individual_data and isinstance(individual_data['color'], list):
-                        individual_data['red'] = individual_data['color'][0]
-                        individual_data['green'] = individual_data['color'][1]
-                        individual_data['blue'] = individual_data['color'][2]
-                    self.individuals.append(Individual(individual_data, individual_data.get('row', 0), individual_data.get('col', 0)))
-            else:
-                for caracterization in data['caracterizations']:
-                    for _ in range(caracterization['amount']):
-                        self.individuals.append(Individual(caracterization, 0, 0))
+        self.individuals = load_individuals(self.root_path + "input" + self.sep + self.directory + self.sep + "individuals.json")
 
     
     def load_crowd_map(self):
@@ -98,30 +83,31 @@ class Scenario(object):
     def extract_doors_info(self):
         doors_info = []
         visited = set()
-
-        for row in range(len(self.structure_map.map)):
-            for col in range(len(self.structure_map.map[row])):
-                if self.structure_map.map[row][col] == 2 and (row, col) not in visited:
-                    door_info = {'row': row, 'col': col, 'size': 0, 'direction': ''}
-
-                    if col < len(self.structure_map.map[row]) - 1 and self.structure_map.map[row][col + 1] == 2:
-                        door_info['direction'] = 'H'
-
-                        c = col
-                        while c < len(self.structure_map.map[row]) and self.structure_map.map[row][c] == 2:
-                            door_info['size'] += 1
-                            visited.add((row, c))
-                            c += 1
-                    elif row < len(self.structure_map.map) - 1 and self.structure_map.map[row + 1][col] == 2:
-                        door_info['direction'] = 'V'
-
-                        l = row
-                        while l < len(self.structure_map.map) and self.structure_map.map[l][col] == 2:
-                            door_info['size'] += 1
-                            visited.add((l, col))
-                            l += 1
-
-                    doors_info.append(door_info)
+        # Only the door cells (row-major, from the structure map scan) are walked, not the whole map
+        doors = set(self.structure_map.exits)
+
+        for row, col in self.structure_map.exits:
+            if (row, col) not in visited:
+                door_info = {'row': row, 'col': col, 'size': 0, 'direction': ''}
+
+                if (row, col + 1) in doors:
+                    door_info['direction'] = 'H'
+
+                    c = col
+                    while (row, c) in doors:
+                        door_info['size'] += 1
+                        visited.add((row, c))
+                        c += 1
+                elif (row + 1, col) in doors:
+                    door_info['direction'] = 'V'
+
+                    l = row
+                    while (l, col) in doors:
+                        door_info['size'] += 1
+                        visited.add((l, col))
+                        l += 1
+
+                doors_info.append(door_info)
 
         return doors_info
 
@@ -73,12 +73,12 @@ class StaticMap(object):
         for i in range(self.len_row):
             static_map_row = []
             for j in range(self.len_col):
-                if (self.structure_map.map[i][j] == Constants.M_DOOR): # If it is a DOOR
+                if (self.structure_map.map_list[i][j] == Constants.M_DOOR): # If it is a DOOR
                     exit_gates.append([i, j, 1])
                     static_map_row.append(1)
-                elif (self.structure_map.map[i][j] == Constants.M_WALL or self.structure_map.map[i][j] == Constants.M_OBJECT or self.structure_map.map[i][j] == Constants.M_VOID): # If it is a WALL, OBJECT or VOID
+                elif (self.structure_map.map_list[i][j] == Constants.M_WALL or self.structure_map.map_list[i][j] == Constants.M_OBJECT or self.structure_map.map_list[i][j] == Constants.M_VOID): # If it is a WALL, OBJECT or VOID
                     static_map_row.append(Constants.S_WALL)
-                elif (self.structure_map.map[i][j] == Constants.M_EMPTY):
+                elif (self.structure_map.map_list[i][j] == Constants.M_EMPTY):
                     static_map_row.append(Constants.M_EMPTY)
                 else:
                     # Fallback: treat any unknown value as empty space
@@ -187,13 +187,13 @@ class StaticMap(object):
 
         for i in range(self.len_row):
             for j in range(self.len_col):
-                if (self.structure_map.map[i][j] == Constants.M_OBJECT):
+                if (self.structure_map.map_list[i][j] == Constants.M_OBJECT):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_GRAY, Constants.C_GRAY)
-                elif (self.structure_map.map[i][j] == Constants.M_VOID):
+                elif (self.structure_map.map_list[i][j] == Constants.M_VOID):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_LIGHT_BLACK, Constants.C_LIGHT_BLACK)
-                elif (self.structure_map.map[i][j] == Constants.M_WALL or self.map[i][j] == Constants.S_WALL):
+                elif (self.structure_map.map_list[i][j] == Constants.M_WALL or self.map[i][j] == Constants.S_WALL):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_BLACK, Constants.C_BLACK)
-                elif (self.structure_map.map[i][j] == Constants.M_DOOR):
+                elif (self.structure_map.map_list[i][j] == Constants.M_DOOR):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_RED, Constants.C_BLACK)
                 else: # Draw or empty case
                     color = str(colors[int(self.map[i][j])].hex)
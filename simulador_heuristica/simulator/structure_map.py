@@ -1,7 +1,17 @@
 # -*- coding:utf-8 -*-
 from pathlib import Path
+
+import numpy as np
+
 from .constants import Constants
 
+
+def _find_cells(grid, value):
+    """Returns the (row, col) positions of the grid equal to value, in row-major order."""
+    rows, cols = np.nonzero(grid == value)
+    return list(zip(rows.tolist(), cols.tolist()))
+
+
 class StructureMap(object):
     """Responsable to store the map fisical informations: doors, walls, etc.
 
@@ -12,8 +22,11 @@ class StructureMap(object):
     label : str
         The name of the static map.
         
-    map : list of list of int
-        The map with values of static fields.
+    map : numpy.ndarray
+        The map with values of static fields, as a (len_row, len_col) uint8 array.
+
+    map_list : list of list of int
+        The same map as native lists, for the cell-by-cell loops of the other maps.
 
     len_row : int
         The horizontal size of the map.
@@ -46,7 +59,8 @@ class StructureMap(object):
         else:
             self.path = Path(path)
 
-        self.map = []
+        self.map = np.zeros((0, 0), dtype=np.uint8)
+        self._map_list = None
         self.len_row = 0
         self.len_col = 0
         self.exits = []
@@ -57,16 +71,29 @@ class StructureMap(object):
         if not self.path.exists():
             raise FileNotFoundError(f"Mapa não encontrado em {self.path}")
 
-        with open(self.path, 'r') as file:
-            for line in file:
-                line = line.strip('\n')
-                self.map.append([int(col) for col in line])
-                self.len_row += 1
-
-        if self.len_row > 0:
-            self.len_col = len(self.map[0])
+        rows = self.path.read_bytes().splitlines()
+        width = len(rows[0]) if rows else 0
+        if any(len(row) != width for row in rows):
+            raise ValueError(f"Mapa não retangular em {self.path}")
+        # Converte todos os dígitos numa única operação
+        cells = np.frombuffer(b''.join(rows), dtype=np.uint8) - ord('0')
+        if (cells > 9).any():
+            raise ValueError(f"Mapa com caracteres inválidos em {self.path}")
+        self.map = cells.reshape(len(rows), width)
+        self._map_list = None
+        self.len_row, self.len_col = self.map.shape
         self.exits = self.get_exits()
 
+    @property
+    def map_list(self):
+        """The map as list of list of int, rebuilt only after the map changes.
+
+        Indexing a list is much cheaper than indexing the array one cell at a time.
+        """
+        if self._map_list is None:
+            self._map_list = self.map.tolist()
+        return self._map_list
+
     def get_empty_positions(self):
         """Returns a list which contains the empty positions of the structure map.
 
@@ -75,12 +102,7 @@ class StructureMap(object):
         list of tuple
             List that contains the empty positions of the structure map.
         """
-        empty_positions = []
-        for i in range(self.len_row):
-            for j in range(self.len_col):
-                if (self.map[i][j] == Constants.M_EMPTY):
-                    empty_positions.append((i, j))
-        return empty_positions
+        return _find_cells(self.map, Constants.M_EMPTY)
 
     def isSaida(self, row, col):
         """Returns if the position is an exit or not.
@@ -92,7 +114,7 @@ class StructureMap(object):
         """
         if row < 0 or row >= self.len_row or col < 0 or col >= self.len_col:
             return False
-        return self.map[row][col] == Constants.M_DOOR 
+        return self.map_list[row][col] == Constants.M_DOOR
 
     def get_exits(self):
         """Returns a list which contains the exits of the structure map.
@@ -102,23 +124,27 @@ class StructureMap(object):
         list of tuple
             List that contains the exits of the structure map.
         """
-        exits = []
-        for i in range(self.len_row):
-            for j in range(self.len_col):
-                if (self.map[i][j] == Constants.M_DOOR):
-                    exits.append((i, j))
-        return exits
+        return _find_cells(self.map, Constants.M_DOOR)
 
     def rewrite_doors(self, new_doors):
-        for exit in self.exits:
-            self.map[exit[0]][exit[1]] = Constants.M_WALL
-        
+        """Replace the current exits by new doors.
+
+        Parameters
+        ----------
+        new_doors : list of dict
+            Doors as {'row', 'col', 'size', 'direction'}; 'V' doors grow downwards, the others to the right.
+            Cells outside the map are ignored.
+        """
+        self.map[self.map == Constants.M_DOOR] = Constants.M_WALL
+
         for new_door in new_doors:
+            row, col, size = new_door['row'], new_door['col'], new_door['size']
+            # Slices already stop at the map end; negative starts are clamped instead of wrapping
             if new_door['direction'] == 'V':
-                for i in range(0, new_door['size']):
-                    self.map[new_door['row'] + i][new_door['col']]
-            else:
-                for i in range(0, new_door['size']): 
-                    self.map[new_door['row']][new_door['col'] + i]            
+                if 0 <= col < self.len_col:
+                    self.map[max(row, 0):max(row + size, 0), col] = Constants.M_DOOR
+            elif 0 <= row < self.len_row:
+                self.map[row, max(col, 0):max(col + size, 0)] = Constants.M_DOOR
 
-        self.exits = self.get_exits()
\ No newline at end of file
+        self._map_list = None
+        self.exits = self.get_exits()
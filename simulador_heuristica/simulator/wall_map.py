@@ -73,7 +73,7 @@ class WallMap(object):
         for i in range(self.len_row):
             wall_map_row = []
             for j in range(self.len_col):
-                cell = self.structure_map.map[i][j]
+                cell = self.structure_map.map_list[i][j]
                 if (cell == Constants.M_WALL or cell == Constants.M_OBJECT):
                     self.wall_direction(walls, i, j)
                     wall_map_row.append(0)
@@ -87,7 +87,7 @@ class WallMap(object):
         self.calc_wall_field(deepcopy(walls))
         for i in range(self.len_row):
             for j in range(self.len_col):
-                if (self.structure_map.map[i][j] == Constants.M_WALL or self.structure_map.map[i][j] == Constants.M_OBJECT):
+                if (self.structure_map.map_list[i][j] == Constants.M_WALL or self.structure_map.map_list[i][j] == Constants.M_OBJECT):
                     self.map[i][j] = 0
 
     def wall_direction(self, walls, i, j):
@@ -111,21 +111,21 @@ class WallMap(object):
         left = (j - 1) >= 0
         right = (j + 1) < len_col
 
-        if top and (self.structure_map.map[i - 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)):
+        if top and (self.structure_map.map_list[i - 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)):
             walls.append([i, j, 0, Constants.D_TOP])
-        if top and right and (self.structure_map.map[i - 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)) and (self.structure_map.map[i][j + 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
+        if top and right and (self.structure_map.map_list[i - 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)) and (self.structure_map.map_list[i][j + 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
             walls.append([i, j, 0, Constants.D_TOP_RIGHT])
-        if right and (self.structure_map.map[i][j + 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
+        if right and (self.structure_map.map_list[i][j + 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
             walls.append([i, j, 0, Constants.D_RIGHT])
-        if bottom and right and (self.structure_map.map[i + 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)) and (self.structure_map.map[i][j + 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
+        if bottom and right and (self.structure_map.map_list[i + 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)) and (self.structure_map.map_list[i][j + 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
             walls.append([i, j, 0, Constants.D_BOTTOM_RIGHT])
-        if bottom and (self.structure_map.map[i + 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)):
+        if bottom and (self.structure_map.map_list[i + 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)):
             walls.append([i, j, 0, Constants.D_BOTTOM])
-        if bottom and left and (self.structure_map.map[i + 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)) and (self.structure_map.map[i][j - 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
+        if bottom and left and (self.structure_map.map_list[i + 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)) and (self.structure_map.map_list[i][j - 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
             walls.append([i, j, 0, Constants.D_BOTTOM_LEFT])
-        if left and (self.structure_map.map[i][j - 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
+        if left and (self.structure_map.map_list[i][j - 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
             walls.append([i, j, 0, Constants.D_LEFT])
-        if top and left and (self.structure_map.map[i - 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)) and (self.structure_map.map[i][j - 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
+        if top and left and (self.structure_map.map_list[i - 1][j] in (Constants.M_EMPTY, Constants.M_DOOR)) and (self.structure_map.map_list[i][j - 1] in (Constants.M_EMPTY, Constants.M_DOOR)):
             walls.append([i, j, 0, Constants.D_TOP_LEFT])
 
     def calc_wall_field(self, walls):
@@ -246,11 +246,11 @@ class WallMap(object):
 
         for i in range(self.len_row):
             for j in range(self.len_col):
-                if (self.structure_map.map[i][j] == Constants.M_WALL):
+                if (self.structure_map.map_list[i][j] == Constants.M_WALL):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_BLACK, Constants.C_BLACK)
-                elif (self.structure_map.map[i][j] == Constants.M_OBJECT):
+                elif (self.structure_map.map_list[i][j] == Constants.M_OBJECT):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_GRAY, Constants.C_GRAY)
-                elif (self.structure_map.map[i][j] == Constants.M_VOID):
+                elif (self.structure_map.map_list[i][j] == Constants.M_VOID):
                     draw.rectangle((j * field_size, i * field_size, (j + 1) * field_size, (i + 1) * field_size), Constants.C_LIGHT_BLACK, Constants.C_LIGHT_BLACK)
                 else:
                     color = str(colors[int(self.map[i][j])].hex)
@@ -10,14 +10,8 @@ import ctypes
 import numpy as np
 import logging
 
-# ====================== ADDED LOGGING CONFIGURATION ==========================
-logging.basicConfig(
-    level=logging.INFO,  # só INFO para não poluir com DEBUG
-    format='[%(asctime)s] [%(levelname)s] %(message)s',
-    datefmt='%H:%M:%S'
-)
+# The handler/format is configured by the entry script (sim_ca_main3.py), not on import
 logger = logging.getLogger(__name__)
-# ============================================================================
 
 
 class Chromosome:
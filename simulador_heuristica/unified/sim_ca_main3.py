@@ -2,6 +2,7 @@
 
 import argparse
 import json
+import logging
 import random
 import numpy as np
 
@@ -58,6 +59,11 @@ def save_result(result, uncoded, filename):
         json.dump(solution, outfile, indent=2)
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,  # só INFO para não poluir com DEBUG
+        format='[%(asctime)s] [%(levelname)s] %(message)s',
+        datefmt='%H:%M:%S'
+    )
     try:
         args = parser.parse_args()
 
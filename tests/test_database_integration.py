@@ -0,0 +1,173 @@
+import sys
+import types
+import threading
+import pytest
+from pathlib import Path
+
+# insert fake constants module to avoid heavy simulator import
+fake_mod = types.ModuleType('simulador_heuristica.simulator.constants')
+class _C:
+    M_EMPTY = 0
+    M_WALL = 1
+    M_DOOR = 2
+fake_mod.Constants = _C
+sys.modules['simulador_heuristica.simulator.constants'] = fake_mod
+
+# ensure project root is on sys.path so 'interface' package can be imported
+proj_root = Path(__file__).resolve().parents[1]
+if str(proj_root) not in sys.path:
+    sys.path.insert(0, str(proj_root))
+
+from interface.services import simulator_integration
+from interface.services.simulator_integration import DatabaseIntegration
+
+
+def test_connection_is_shared_across_threads(tmp_path):
+    db = DatabaseIntegration(str(tmp_path / 'sim.db'))
+    con = db._conn()
+    assert db._conn() is con
+    assert con.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(db._conn()))
+    t.start()
+    t.join()
+    assert other[0] is con
+
+    map_id = db.save_map('mapa_a', '111\n121\n')
+    assert map_id > 0 and db.save_map('mapa_a', '111\n131\n') == map_id
+    sim_id = db.create_simulation_return_id(map_id, 'sim', 'NSGA-II', '{}', '{}', '{}', '{}')
+    assert db.get_simulation(sim_id)['mapa'] == 'mapa_a'
+    assert [s['id'] for s in db.get_simulations()] == [sim_id]
+    assert [s['mapa'] for s in db.get_simulations_by_map('mapa_a')] == ['mapa_a']
+    assert db.get_simulations_by_map('outro') == []
+    db.close()
+    assert db._con is None
+    # closing does not retire the instance: the thread reconnects on the next call
+    assert db.get_simulation(sim_id)['mapa'] == 'mapa_a'
+    db.close()
+
+
+def test_save_simulations_bulk_is_atomic(tmp_path):
+    db = DatabaseIntegration(str(tmp_path / 'sim.db'))
+    map_id = db.save_map('mapa_b', '111\n')
+    rows = [(i, map_id, f'sim_{i}', 'NSGA-II', '{}', '{}', '{}', '{}', None, 0) for i in (1, 2, 3)]
+    assert db.save_simulations_bulk(rows)
+    assert sorted(s['id'] for s in db.get_simulations()) == [1, 2, 3]
+
+    # a bad row (missing map, foreign key) rolls back the whole batch
+    bad = [(4, map_id, 'sim_4', 'NSGA-II', '{}', '{}', '{}', '{}', None, 0),
+           (5, map_id + 99, 'sim_5', 'NSGA-II', '{}', '{}', '{}', '{}', None, 0)]
+    assert db.save_simulations_bulk(bad) is False
+    assert len(db.get_simulations()) == 3
+    assert db.save_simulation(7, map_id, 'sim_7', 'NSGA-II', '{}', '{}', '{}', '{}')
+    assert db.get_simulation(7)['nome'] == 'sim_7'
+
+
+def test_results_saved_in_the_same_second_are_kept(tmp_path):
+    db = DatabaseIntegration(str(tmp_path / 'sim.db'))
+    map_id = db.save_map('mapa_c', '111\n')
+    sim_id = db.create_simulation_return_id(map_id, 'sim', 'NSGA-II', '{}', '{}', '{}', '{}')
+    assert db.save_result(sim_id, '[1]') and db.save_nsga_results(sim_id, '[2]')
+    rows = db._conn().execute('SELECT frente_pareto_json FROM Resultado ORDER BY id_resultado').fetchall()
+    assert [r[0] for r in rows] == ['[1]', '[2]']
+
+
+@pytest.mark.parametrize('has_returning', [True, False])
+def test_save_map_returns_existing_id(tmp_path, monkeypatch, has_returning):
+    monkeypatch.setattr(simulator_integration, '_HAS_RETURNING', has_returning)
+    db = DatabaseIntegration(str(tmp_path / 'sim.db'))
+    first = db.save_map('mapa_d', '111\n')
+    assert db.save_map('outro', '1\n') != first
+    assert db.save_map('mapa_d', '121\n') == first
+    stored = db._conn().execute('SELECT arquivo_map FROM Mapa WHERE id_mapa = ?', (first,)).fetchone()[0]
+    assert stored == '121\n'
+
+
+def test_schema_indexes_are_added_to_existing_databases(tmp_path):
+    import sqlite3
+    path = tmp_path / 'old.db'
+    con = sqlite3.connect(path)
+    con.executescript(simulator_integration._SCHEMA_SQL.split('CREATE INDEX')[0])
+    con.close()
+    db = DatabaseIntegration(str(path))
+    names = {r[0] for r in db._conn().execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_sim_mapa_iddesc', 'idx_res_simid'} <= names
+    plan = ' '.join(r[-1] for r in db._conn().execute(
+        'EXPLAIN QUERY PLAN ' + simulator_integration._SELECT_SIMS_SQL % 'WHERE m.nome = ?', ('m',)))
+    assert 'idx_sim_mapa_iddesc' in plan
+
+
+def test_bulk_saves_share_one_transaction(tmp_path):
+    db = DatabaseIntegration(str(tmp_path / 'sim.db'))
+    assert db.save_maps_bulk([('m1', 'a'), ('m2', 'b'), ('m1', 'c')])
+    maps = dict(db._conn().execute('SELECT nome, arquivo_map FROM Mapa').fetchall())
+    assert maps == {'m1': 'c', 'm2': 'b'}
+
+    m1 = db.save_map('m1', 'c')
+    row = (10, m1, 'sim_10', 'NSGA-II', '{}', '{}', '{}', '{}', None, 1)
+    try:
+        with db.transaction():
+            assert db.save_maps_bulk([('m3', 'x')])
+            assert db.save_simulations_bulk([row])
+            raise RuntimeError('abort')
+    except RuntimeError:
+        pass
+    assert db.get_simulations() == [] and db.get_simulations_by_map('m3') == []
+    assert db._conn().execute("SELECT count(*) FROM Mapa WHERE nome = 'm3'").fetchone()[0] == 0
+
+    with db.transaction():
+        db.save_maps_bulk([('m3', 'x')])
+        db.save_simulations_bulk([row])
+    assert [s['id'] for s in db.get_simulations()] == [10]
+
+
+def test_transaction_keeps_other_threads_out(tmp_path):
+    db = DatabaseIntegration(str(tmp_path / 'sim.db'))
+    started = threading.Event()
+    t = threading.Thread(target=lambda: (started.set(), db.save_map('de_fora', '1\n')))
+    try:
+        with db.transaction():
+            db.save_maps_bulk([('dentro', 'x')])
+            t.start()
+            started.wait()
+            t.join(0.2)
+            # the other thread's save waits for the lock instead of joining this transaction
+            assert t.is_alive()
+            raise RuntimeError('abort')
+    except RuntimeError:
+        pass
+    t.join()
+    names = [r[0] for r in db._conn().execute('SELECT nome FROM Mapa')]
+    assert names == ['de_fora']
+
+
+def test_short_lived_threads_do_not_leak_connections(tmp_path):
+    # Streamlit runs each rerun on a new thread against the instance kept in session_state
+    db = DatabaseIntegration(str(tmp_path / 'sim.db'))
+    con = db._conn()
+    fd_dir = Path('/proc/self/fd')
+    before = len(list(fd_dir.iterdir())) if fd_dir.is_dir() else None
+    seen = []
+    for _ in range(30):
+        t = threading.Thread(target=lambda: (db.get_simulations(), seen.append(db._conn())))
+        t.start()
+        t.join()
+    assert all(c is con for c in seen) and len(seen) == 30
+    if before is not None:
+        assert len(list(fd_dir.iterdir())) <= before
+    db.close()
+
+
+def test_failed_bulk_save_rolls_back_the_transaction(tmp_path):
+    import sqlite3
+    db = DatabaseIntegration(str(tmp_path / 'sim.db'))
+    m1 = db.save_map('m1', 'a')
+    bad = (11, m1 + 99, 'sim_11', 'NSGA-II', '{}', '{}', '{}', '{}', None, 1)
+    with pytest.raises(sqlite3.IntegrityError):
+        with db.transaction():
+            assert db.save_maps_bulk([('m2', 'b')])
+            db.save_simulations_bulk([bad])
+    assert not db._conn().in_transaction
+    assert db._conn().execute("SELECT count(*) FROM Mapa WHERE nome = 'm2'").fetchone()[0] == 0
+    assert db.get_simulations() == []
@@ -33,6 +33,10 @@ def test_extract_from_dict(tmp_path):
     assert nd == 4
     assert dist == 2.5
 
+    # the preferred key wins regardless of the order of the keys in the dict
+    res = {'distancia_total': 9.0, 'iterations': 12, 'qtdDistance': 3.5}
+    assert prob._extract_objectives(res, num_doors=1) == [1.0, 3.5]
+
 
 def test_extract_from_metrics_file(tmp_path):
     sim = SimulatorIntegration(base_path=str(tmp_path))
@@ -56,3 +60,37 @@ def test_extract_from_stdout(tmp_path):
     # num_doors should be reflected and distance parsed
     assert nd == 3
     assert dist == pytest.approx(0.5)
+
+
+def test_extract_from_stderr_log_lines(tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    prob = EvacuationProblem(sim, "0", {"caracterizations": []}, [], {})
+    # simulator logger writes to stderr; the last printed distance wins
+    stderr = (
+        "2024-01-01 10:00:00,000 INFO simulator: qtd iteracoes 31\n"
+        "2024-01-01 10:00:00,001 INFO simulator: qtd distancia 589.47\n"
+    )
+    nd, dist = prob._extract_objectives({}, stdout="nothing here", stderr=stderr, num_doors=1)
+    assert nd == 1
+    assert dist == pytest.approx(589.47)
+
+
+def test_extract_scans_output_directory(tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    outdir = tmp_path / 'scan_exp'
+    outdir.mkdir()
+    (outdir / 'metrics.json').write_text(json.dumps({'distancia_total': 7.25}))
+    (outdir / 'other.json').write_text(json.dumps({'distance': 99}))
+    prob = EvacuationProblem(sim, "0", {"caracterizations": []}, [], {})
+    nd, dist = prob._extract_objectives({'directory': str(outdir)}, num_doors=1)
+    assert nd == 1
+    assert dist == 7.25
+
+    # with several metrics files the most recently written one wins
+    import os
+    old = outdir / 'metrics_old.json'
+    old.write_text(json.dumps({'distance': 1.5}))
+    os.utime(old, ns=(10**9, 10**9))
+    os.utime(outdir / 'metrics.json', ns=(10**9, 10**9))
+    (outdir / 'metrics_new.json').write_text(json.dumps({'distance': 2.5}))
+    assert prob._extract_objectives({'directory': str(outdir)}, num_doors=1)[1] == 2.5
@@ -2,6 +2,8 @@ import os
 import json
 import numpy as np
 import tempfile
+import threading
+import time
 import pytest
 import sys
 import types
@@ -56,3 +58,261 @@ def test_minimal_nsga_run(monkeypatch, tmp_path):
     assert F.shape[0] == pop.shape[0]
     assert F.shape[1] == 2
     assert np.isfinite(F).all()
+
+
+def test_problem_pickle_excludes_simulator_handle(tmp_path):
+    import pickle
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    prob = EvacuationProblem(sim, "020", {"caracterizations": []}, [(1, 0)], simulation_params={})
+    clone = pickle.loads(pickle.dumps(prob))
+    # the simulator handle is rebuilt from its base path instead of being pickled
+    assert clone.simulator_integration is not sim
+    assert clone.simulator_integration.base_path == sim.base_path
+    assert clone.door_positions == prob.door_positions
+
+
+def test_generate_map_with_doors_only_activates_selected(tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    prob = EvacuationProblem(sim, "1221\n1001\n2111\n", {"caracterizations": []}, [(1, 0), (2, 0), (0, 2)])
+    # existing doors are cleared; out-of-range positions are ignored
+    assert prob._generate_map_with_doors([(2, 0), (0, 2), (9, 1), (0, 5)]) == "1021\n1001\n2111\n"
+    assert prob._generate_map_with_doors([]) == "1001\n1001\n0111\n"
+
+
+def test_steady_state_run_spends_evaluation_budget(monkeypatch, tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    monkeypatch.setattr(sim, 'start_workers', lambda n_workers=None: None)
+    nsga = NSGAIntegration(sim)
+    nsga.config = {'population_size': 4, 'generations': 3, 'crossover_rate': 0.9,
+                   'mutation_rate': 0.1, 'async_backend': 'steady_state'}
+    nsga.simulation_params = {}
+    door_positions = [(0, 0), (2, 0), (0, 2), (2, 2)]
+    assert nsga.setup_optimization("202\n000\n202", {"caracterizations": []}, door_positions)
+
+    calls = []
+
+    def objectives(gene):
+        n = float(np.sum(gene))
+        # distance depends on the exact gene, so a mismatched pairing shows up in F
+        return [n, 10.0 / (n + 1) + 0.001 * int(np.packbits(np.asarray(gene, dtype=bool))[0])]
+
+    def fake_evaluate_single(gene):
+        calls.append(np.array(gene, dtype=bool))
+        # later submissions finish first, so completions arrive out of order
+        time.sleep(0.02 * (3 - len(calls) % 4))
+        return objectives(gene)
+
+    monkeypatch.setattr(nsga.problem, '_evaluate_single', fake_evaluate_single)
+    try:
+        res = nsga.run_optimization()
+    finally:
+        nsga.close()
+    assert res is not None
+    # the whole budget (population_size x generations) is spent, one simulation each
+    assert len(calls) == 12
+    assert res.F.shape[1] == 2
+    # every result is paired with the gene that was submitted for it
+    for x, f in zip(res.pop.get('X'), res.pop.get('F')):
+        assert np.allclose(f, nsga.problem._objectives_matrix([objectives(x)], 1)[0])
+
+
+def test_close_removes_shared_individuals_file(monkeypatch, tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    monkeypatch.setattr(sim, 'start_workers', lambda n_workers=None: None)
+    monkeypatch.setattr(sim, 'stop_workers', lambda: None)
+    nsga = NSGAIntegration(sim)
+    nsga.config = {'population_size': 2, 'generations': 1, 'crossover_rate': 0.9, 'mutation_rate': 0.1}
+    nsga.simulation_params = {}
+    assert nsga.setup_optimization("202\n000\n202", {"caracterizations": []}, [(0, 0), (2, 2)])
+    path = nsga.problem._ensure_individuals_file()
+    assert path.exists()
+    nsga.close()
+    assert not path.exists()
+    # recreated on demand, and removed again by shutdown()
+    assert nsga.problem._ensure_individuals_file().exists()
+    nsga.shutdown()
+    assert not path.exists()
+
+
+def test_steady_state_run_starts_from_initial_population(monkeypatch, tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    monkeypatch.setattr(sim, 'start_workers', lambda n_workers=None: None)
+    nsga = NSGAIntegration(sim)
+    nsga.config = {'population_size': 4, 'generations': 2, 'crossover_rate': 0.9,
+                   'mutation_rate': 0.1, 'async_backend': 'steady_state'}
+    nsga.simulation_params = {}
+    seeded = [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]]
+    assert nsga.setup_optimization("202\n000\n202", {"caracterizations": []},
+                                   [(0, 0), (2, 0), (0, 2), (2, 2)], initial_population=seeded)
+    calls = []
+    lock = threading.Lock()
+
+    def fake_evaluate_single(gene):
+        with lock:
+            calls.append(np.asarray(gene, dtype=int).tolist())
+        n = float(np.sum(gene))
+        return [n, 10.0 / (n + 1)]
+
+    monkeypatch.setattr(nsga.problem, '_evaluate_single', fake_evaluate_single)
+    try:
+        assert nsga.run_optimization() is not None
+    finally:
+        nsga.close()
+    # the supplied population is evaluated first, instead of a random sample
+    assert sorted(calls[:4]) == sorted(seeded)
+
+
+def test_steady_state_run_logs_failed_evaluations(monkeypatch, tmp_path, caplog):
+    import logging
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    monkeypatch.setattr(sim, 'start_workers', lambda n_workers=None: None)
+    nsga = NSGAIntegration(sim)
+    nsga.config = {'population_size': 2, 'generations': 2, 'crossover_rate': 0.9,
+                   'mutation_rate': 0.1, 'async_backend': 'steady_state'}
+    nsga.simulation_params = {}
+    assert nsga.setup_optimization("202\n000\n202", {"caracterizations": []}, [(0, 0), (2, 0), (0, 2), (2, 2)])
+
+    def broken(gene):
+        raise RuntimeError('simulator not configured')
+
+    monkeypatch.setattr(nsga.problem, '_evaluate_single', broken)
+    with caplog.at_level(logging.ERROR):
+        try:
+            res = nsga.run_optimization()
+        finally:
+            nsga.close()
+    assert res is not None and (res.pop.get('F') >= 1e6).all()
+    failures = [r for r in caplog.records if 'falhou' in r.getMessage()]
+    assert len(failures) == 4 and 'simulator not configured' in caplog.text
+
+
+def test_evaluation_cache_skips_repeated_genes(monkeypatch, tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    runs = []
+    monkeypatch.setattr(sim, 'run_simulator', lambda name, **kw: runs.append(name))
+    monkeypatch.setattr(sim, 'read_results', lambda name: {'distance': 7.5})
+    prob = EvacuationProblem(sim, "020", {"caracterizations": []}, [(1, 0)])
+
+    gene = np.array([True])
+    assert prob._evaluate_single(gene) == [1.0, 7.5]
+    assert prob._evaluate_single(gene) == [1.0, 7.5]
+    assert len(runs) == 1
+
+    # the hit is recorded as its own evaluation, so save_results can match it too
+    index = [json.loads(l) for l in (Path(sim.output_path) / 'metrics_index.jsonl').read_text().splitlines()]
+    assert [(e['eval'], e['num_doors'], e['distancia_total']) for e in index] == [('nsga_eval_1', 1, 7.5)]
+
+    # the cache survives across runs of the same problem, as JSON
+    cache_file = tmp_path / 'eval_cache.json'
+    prob.save_eval_cache(cache_file)
+    assert json.loads(cache_file.read_text())[prob._cache_signature] == [['80', [1.0, 7.5, None]]]
+    again = EvacuationProblem(sim, "020", {"caracterizations": []}, [(1, 0)])
+    assert again.load_eval_cache(cache_file) == 1
+    assert again._evaluate_single(gene) == [1.0, 7.5]
+    assert len(runs) == 1
+    prob.remove_individuals_file()
+    again.remove_individuals_file()
+
+
+def test_eval_cache_file_keeps_the_most_recent_problems(tmp_path, monkeypatch):
+    from interface.services import nsga_integration
+    monkeypatch.setattr(nsga_integration, '_EVAL_CACHE_MAX_PROBLEMS', 2)
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    cache_file = tmp_path / 'eval_cache.json'
+    signatures = []
+    for template in ("020", "200", "002"):
+        prob = EvacuationProblem(sim, template, {"caracterizations": []}, [(1, 0)])
+        prob._eval_cache[b'\x80'] = (1.0, 2.0, 3)
+        prob.save_eval_cache(cache_file)
+        signatures.append(prob._cache_signature)
+    assert list(json.loads(cache_file.read_text())) == signatures[1:]
+
+
+def test_match_iterations_pairs_by_doors_and_distance():
+    from interface.services.nsga_integration import _match_iterations
+    matched = _match_iterations(
+        np.array([2, 1, 3, -1], dtype=np.int32),
+        np.array([10.0, np.nan, 4.0, 1.0]),
+        np.array([2, 2, 1, 3], dtype=np.int32),
+        np.array([12.0, 10.005, 7.0, 9.0]),
+        np.array([5, 6, 7, 8], dtype=np.int64),
+    )
+    # within 0.1% distance, any distance when unknown, no match, missing num_doors
+    assert matched.tolist() == [6, 7, -1, -1]
+
+    # the nearest distance wins; an eval without distance matches on num_doors alone
+    matched = _match_iterations(
+        np.array([4, 5], dtype=np.int32),
+        np.array([100.0, 50.0]),
+        np.array([4, 4, 5, 4], dtype=np.int32),
+        np.array([100.09, 99.99, np.nan, 100.0]),
+        np.array([1, 2, 3, 4], dtype=np.int64),
+    )
+    assert matched.tolist() == [4, 3]
+
+
+def test_match_iterations_jitted_matches_python(tmp_path):
+    pytest.importorskip('numba')
+    from interface.services import nsga_integration
+    assert nsga_integration.HAS_NUMBA
+    jitted = nsga_integration._match_iterations
+    rng = np.random.default_rng(7)
+    r_num = rng.integers(-1, 4, 50).astype(np.int32)
+    r_dist = np.where(rng.random(50) < 0.2, np.nan, rng.uniform(1, 10, 50).round(2))
+    e_num = rng.integers(-1, 4, 80).astype(np.int32)
+    e_dist = np.where(rng.random(80) < 0.2, np.nan, rng.uniform(1, 10, 80).round(2))
+    e_iter = rng.integers(1, 100, 80).astype(np.int64)
+    args = (r_num, r_dist, e_num, e_dist, e_iter)
+    assert jitted(*args).tolist() == jitted.py_func(*args).tolist()
+
+    # the real call site hands it arrays the compiled signature accepts
+    import types
+    nsga = NSGAIntegration(SimulatorIntegration(base_path=str(tmp_path)))
+    result = types.SimpleNamespace(X=np.array([[1, 1], [1, 0]]), F=np.array([[2.0, 10.0], [1.0, 4.0]]))
+    evals = [{'num_doors': 2, 'distancia_total': 10.001, 'iterations': 5},
+             {'num_doors': '1', 'distance': '4,0', 'qtd_iteracoes': 6}]
+    assert nsga._match_saved_solutions(result, evals) == [5, 6]
+
+
+def test_packed_bit_duplicate_elimination_keeps_first_occurrence():
+    from pymoo.core.population import Population
+    from interface.services.nsga_integration import PackedBitDuplicateElimination
+    pop = Population.new(X=np.array([[1, 0, 1], [0, 0, 1], [1, 0, 1], [1, 1, 1]], dtype=bool))
+    other = Population.new(X=np.array([[1, 1, 1]], dtype=bool))
+    kept = PackedBitDuplicateElimination().do(pop, other)
+    assert kept.get("X").astype(int).tolist() == [[1, 0, 1], [0, 0, 1]]
+
+
+def test_setup_optimization_reuses_problem_when_unchanged(tmp_path):
+    nsga = NSGAIntegration(SimulatorIntegration(base_path=str(tmp_path)))
+    nsga.config = {'population_size': 4, 'generations': 1, 'crossover_rate': 0.9, 'mutation_rate': 0.1}
+    nsga.simulation_params = {}
+    try:
+        assert nsga.setup_optimization("202", {"caracterizations": []}, [(0, 0), (2, 0)])
+        problem = nsga.problem
+        assert nsga.setup_optimization("202", {"caracterizations": []}, [(0, 0), (2, 0)])
+        assert nsga.problem is problem
+        assert nsga.setup_optimization("202", {"caracterizations": []}, [(0, 0)])
+        assert nsga.problem is not problem
+    finally:
+        nsga.close()
+
+
+def test_atomic_write_bytes_concurrent_writers(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from interface.services.nsga_integration import _atomic_write_bytes
+    target = tmp_path / 'metrics.json'
+    payloads = [bytes([65 + i]) * 4096 for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda data: _atomic_write_bytes(target, data), payloads))
+    assert target.read_bytes() in payloads
+    assert [p.name for p in tmp_path.iterdir()] == ['metrics.json']
+
+
+def test_pick_metric_fields_follows_key_preference():
+    from interface.services.nsga_integration import _pick_metric_fields
+    fields = _pick_metric_fields({'qtdDistance': 3.0, 'tempo_total': 9, 'distancia_total': 0,
+                                  'iterations': 7, 'qtd_doors': 2})
+    assert fields == {'distance': 3.0, 'iterations': 7, 'num_doors': 2}
+    # with no truthy value the last key of the chain is kept (same as `a or b`)
+    assert _pick_metric_fields({'qtdDistance': 0.0}) == {'distance': 0.0, 'iterations': None, 'num_doors': None}
@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+
+proj_root = Path(__file__).resolve().parents[1]
+if str(proj_root) not in sys.path:
+    sys.path.insert(0, str(proj_root))
+
+import setup_integration
+
+
+def test_check_simulator_structure(monkeypatch, capsys):
+    # the required files are listed relative to the project root
+    monkeypatch.chdir(proj_root)
+    assert setup_integration.check_simulator_structure() is True
+    assert '✓ simulador_heuristica/simulator/main.py encontrado' in capsys.readouterr().out
+
+
+def test_check_simulator_structure_reports_missing_files(monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    assert setup_integration.check_simulator_structure() is False
+    assert 'Arquivos do simulador faltando' in capsys.readouterr().out
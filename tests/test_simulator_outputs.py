@@ -1,4 +1,5 @@
 import json
+import numpy as np
 import os
 from pathlib import Path
 import tempfile
@@ -80,3 +81,329 @@ def test_simulator_read_and_atomic_write(tmp_path):
         # types: first is num_doors (int/float), second is distance (float)
         assert isinstance(objs[0], (int, float))
         assert isinstance(objs[1], (int, float))
+
+
+def test_metrics_index_is_read_incrementally(tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    nsga = NSGAIntegration(sim)
+    index = tmp_path / 'metrics_index.jsonl'
+    assert nsga._read_metrics_index(index) is None
+
+    def line(name, it):
+        return json.dumps({'eval': name, 'path': f'/out/{name}/metrics.json', 'distancia_total': 1.0,
+                           'num_doors': None, 'iterations': it}) + '\n'
+
+    index.write_text(line('nsga_eval_0', 3) + line('nsga_eval_1', 4))
+    assert [e['iterations'] for e in nsga._read_metrics_index(index)] == [3, 4]
+
+    # a rerun of the same eval replaces it; an unterminated line is left for the next read
+    with open(index, 'a') as f:
+        f.write(line('nsga_eval_0', 9) + line('nsga_eval_2', 5)[:-10])
+    assert [e['iterations'] for e in nsga._read_metrics_index(index)] == [9, 4]
+
+
+def test_metrics_index_matches_scan_and_covers_unindexed_evals(tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    nsga = NSGAIntegration(sim)
+    out = Path(sim.output_path)
+    d = out / 'nsga_eval_0'
+    d.mkdir(parents=True)
+    (d / 'metrics.json').write_text(json.dumps({'qtdDistance': 4.5, 'qtd_iteracoes': 12, 'num_doors': 2}))
+    sim._append_metrics_index('nsga_eval_0')
+    indexed = nsga._read_metrics_index(out / 'metrics_index.jsonl')
+    assert indexed == nsga._scan_metrics(out)
+    assert indexed[0]['distancia_total'] == 4.5 and indexed[0]['iterations'] == 12
+
+    # an eval written without an index line (e.g. by the CLI) is still aggregated
+    make_fake_metrics(out, 'nsga_eval_1', iterations=8, distance=2.5)
+    evals = nsga._aggregate_metrics(out / 'results_simx_1.json')
+    assert {e['eval']: e['iterations'] for e in evals} == {'nsga_eval_0': 12, 'nsga_eval_1': 8}
+
+
+def test_save_results_lists_eval_dirs_once(tmp_path, monkeypatch):
+    import types
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    out = Path(sim.output_path)
+    make_fake_metrics(out, 'nsga_eval_0', iterations=12, distance=4.0)
+    sim._append_metrics_index('nsga_eval_0')
+    nsga = NSGAIntegration(sim)
+    nsga.problem = types.SimpleNamespace(door_positions=[(0, 0)])
+    globs = []
+    real_glob = Path.glob
+    monkeypatch.setattr(Path, 'glob', lambda self, pattern: globs.append(pattern) or real_glob(self, pattern))
+    res_obj = types.SimpleNamespace(X=np.array([[1]]), F=np.array([[1.0, 4.0]]))
+    assert nsga.save_results(res_obj, tmp_path / 'results_once_1.json')
+    assert globs.count('nsga_eval_*/metrics.json') == 1
+    assert json.loads((tmp_path / 'results_once_1.json').read_text())[0]['iterations'] == 12
+
+
+def test_consolidated_metrics_parquet_format(tmp_path):
+    pytest.importorskip('pyarrow')
+    from interface.services.nsga_integration import load_consolidated_evaluations
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    make_fake_metrics(Path(sim.output_path), 'nsga_eval_0', iterations=12, distance=4.0)
+    nsga = NSGAIntegration(sim)
+    nsga.config = {'metrics_format': 'parquet'}
+    import types
+    import numpy as _np
+    nsga.problem = types.SimpleNamespace(door_positions=[(0, 0)])
+    res_obj = types.SimpleNamespace(X=_np.array([[1]]), F=_np.array([[1.0, 4.0]]))
+    assert nsga.save_results(res_obj, tmp_path / 'results_pq_1.json')
+
+    consolidated = Path(sim.output_path) / 'pq' / 'metrics.json'
+    summary = json.loads(consolidated.read_text())
+    assert summary['parquet'] == 'metrics.parquet' and summary['num_evals'] == 1
+    evals = load_consolidated_evaluations(consolidated)
+    assert [e['iterations'] for e in evals] == [12]
+
+
+def test_consolidated_metrics_fall_back_to_json_when_parquet_fails(tmp_path, monkeypatch):
+    class _Table:
+        @staticmethod
+        def from_pylist(rows):
+            raise TypeError('mixed types in column')
+    fake_pa = types.ModuleType('pyarrow')
+    fake_pa.Table = _Table
+    fake_pq = types.ModuleType('pyarrow.parquet')
+    fake_pa.parquet = fake_pq
+    monkeypatch.setitem(sys.modules, 'pyarrow', fake_pa)
+    monkeypatch.setitem(sys.modules, 'pyarrow.parquet', fake_pq)
+
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    make_fake_metrics(Path(sim.output_path), 'nsga_eval_0', iterations=12, distance=4.0)
+    nsga = NSGAIntegration(sim)
+    nsga.config = {'metrics_format': 'parquet'}
+    evals = nsga._aggregate_metrics(tmp_path / 'results_pqbad_1.json')
+    assert [e['iterations'] for e in evals] == [12]
+    consolidated_dir = Path(sim.output_path) / 'pqbad'
+    summary = json.loads((consolidated_dir / 'metrics.json').read_text())
+    assert 'parquet' not in summary and [e['iterations'] for e in summary['evaluations']] == [12]
+    assert [p.name for p in consolidated_dir.iterdir()] == ['metrics.json']
+
+
+def test_prepare_experiment_copies_uploads(tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    map_file = tmp_path / 'up_map.txt'
+    map_file.write_text('111\n121\n111\n')
+    ind_file = tmp_path / 'up_ind.json'
+    ind_file.write_text(json.dumps({'caracterizations': []}))
+    in_dir = sim.prepare_experiment_from_uploads('exp_copy', map_file, ind_file)
+    assert (in_dir / 'map.txt').read_bytes() == map_file.read_bytes()
+    assert (in_dir / 'individuals.json').read_bytes() == ind_file.read_bytes()
+    assert (in_dir / 'map.txt').stat().st_mtime_ns == map_file.stat().st_mtime_ns
+
+
+def test_fast_copy_handles_kernel_copies_returning_zero(tmp_path, monkeypatch):
+    from interface.services import simulator_integration as si
+    src = tmp_path / 'src.bin'
+    src.write_bytes(b'0123456789' * 1000)
+    dst = tmp_path / 'dst.bin'
+    # 0 already at offset 0 means "not supported here": the next method copies everything
+    monkeypatch.setattr(si, '_KERNEL_COPIES', (lambda fin, fout, offset, count: 0,))
+    si._fast_copy(src, dst)
+    assert dst.read_bytes() == src.read_bytes()
+
+    # 0 after a partial copy is an error, not a short file reported as success
+    def partial(fin, fout, offset, count):
+        return 0 if offset else os.pwrite(fout, os.pread(fin, 100, 0), 0)
+    monkeypatch.setattr(si, '_KERNEL_COPIES', (partial,))
+    with pytest.raises(OSError):
+        si._fast_copy(src, dst)
+
+
+def test_run_simulator_cli_batch_keeps_order(monkeypatch, tmp_path):
+    import subprocess
+    import time
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+
+    def fake_cli(name, draw=False, scenario_seed=None, simulation_seed=None):
+        time.sleep(0.01 * scenario_seed)
+        return subprocess.CompletedProcess([name], 0, stdout=f'{name}:{scenario_seed}:{simulation_seed}', stderr='')
+
+    monkeypatch.setattr(sim, 'run_simulator_cli', fake_cli)
+    runs = sim.run_simulator_cli_batch([('exp_a', 3, 1), ('exp_b', 1, 2), ('exp_c', 2, 3)], max_workers=3)
+    assert [p.stdout for p in runs] == ['exp_a:3:1', 'exp_b:1:2', 'exp_c:2:3']
+    assert sim.run_simulator_cli_batch([]) == []
+
+
+def test_validate_upload_files(tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    map_file = tmp_path / 'map.txt'
+    map_file.write_text('111\n')
+    ind = tmp_path / 'individuals.json'
+    cases = [
+        ('{"caracterizations": [{"amount": 1}]}\n', True),
+        ('{"outra": []}', False),
+        ('[{"row": 0}]', False),
+        ('{"caracterizations": [', False),
+        ('', False),
+    ]
+    for text, expected in cases:
+        ind.write_text(text)
+        assert sim.validate_upload_files(map_file, ind)[0] is expected, text
+
+
+def test_run_simulator_cli_streams_output_to_log(tmp_path):
+    from interface.services.simulator_integration import _read_log_tail
+    # base_path outside the project: the simulator package is not importable, so the run fails fast
+    sim = SimulatorIntegration(base_path=str(tmp_path / 'sim'))
+    proc = sim.run_simulator_cli('exp_log')
+    log_path = sim.output_path / 'exp_log' / 'simulator.log'
+    assert proc.returncode != 0 and proc.log_path == log_path
+    assert 'simulador_heuristica' in log_path.read_text()
+    assert proc.stdout == log_path.read_text()
+
+    log_path.write_bytes(b'x' * 100 + b'\nqtd iteracoes 12\nqtd distancia 3.5\n')
+    assert _read_log_tail(log_path, max_bytes=40) == 'qtd iteracoes 12\nqtd distancia 3.5\n'
+
+
+def test_experiment_names_are_unique(tmp_path):
+    sims = [SimulatorIntegration(base_path=str(tmp_path)) for _ in range(2)]
+    names = [s.create_experiment_name() for s in sims for _ in range(50)]
+    assert len(set(names)) == len(names)
+    assert all(n.startswith('exp_') for n in names)
+
+
+def test_structure_map_load_and_rewrite_doors(tmp_path):
+    from interface.services.simulator_integration import StructureMap
+    map_file = tmp_path / 'map.txt'
+    map_file.write_text('11211\n00001\n10001\n11111\n')
+    sm = StructureMap('t', str(map_file))
+    sm.load_map()
+    assert (sm.len_row, sm.len_col) == (4, 5)
+    assert sm.get_exits() == [(0, 2)]
+    assert sm.isSaida(0, 2) and not sm.isSaida(1, 1)
+    assert len(sm.get_empty_positions()) == 7
+
+    sm.rewrite_doors([{'row': 1, 'col': 0, 'size': 2, 'direction': 'V'},
+                      {'row': 3, 'col': 1, 'size': 3, 'direction': 'H'}])
+    assert sm.get_exits() == [(1, 0), (2, 0), (3, 1), (3, 2), (3, 3)]
+    assert sm.exits == sm.get_exits()
+    # cells outside the map are skipped instead of wrapping around or raising
+    sm2 = StructureMap('t', str(map_file))
+    sm2.load_map()
+    sm2.rewrite_doors([{'row': 0, 'col': -1, 'size': 2, 'direction': 'H'},
+                       {'row': 3, 'col': 4, 'size': 3, 'direction': 'V'}])
+    assert sm2.get_exits() == [(0, 0), (3, 4)]
+    assert not sm.isSaida(0, 2) and sm.isSaida(3, 2)
+    # masks follow the grid after the rewrite
+    assert (sm._door_mask == (sm.map == 2)).all() and (sm._empty_mask == (sm.map == 0)).all()
+    assert (1, 0) not in sm.get_empty_positions()
+
+    # a second load of the unchanged file reuses the parsed grid but gets its own copy
+    from interface.services.simulator_integration import _parse_map_file
+    hits = _parse_map_file.cache_info().hits
+    sm2 = StructureMap('t', str(map_file))
+    sm2.load_map()
+    assert _parse_map_file.cache_info().hits == hits + 1
+    assert sm2.get_exits() == [(0, 2)]
+
+    map_file.write_text('112\n10\n')
+    with pytest.raises(ValueError):
+        StructureMap('t', str(map_file)).load_map()
+
+
+def test_simulator_structure_map_rewrite_doors_writes_new_doors(tmp_path):
+    from simulador_heuristica.simulator.structure_map import StructureMap as SimStructureMap
+    map_file = tmp_path / 'map.txt'
+    map_file.write_text('11211\n10001\n10001\n11111')
+    sm = SimStructureMap('t', str(map_file))
+    sm.load_map()
+    assert sm.exits == [(0, 2)] and sm.map_list[0][2] == 2
+    sm.rewrite_doors([{'row': 1, 'col': 0, 'size': 2, 'direction': 'V'},
+                      {'row': 3, 'col': 1, 'size': 3, 'direction': 'H'}])
+    assert sm.exits == [(1, 0), (2, 0), (3, 1), (3, 2), (3, 3)]
+    assert sm.map_list[0][2] == 1 and sm.isSaida(3, 2) and not sm.isSaida(0, 2)
+
+    # doors partly outside the map keep only their inside cells
+    sm.rewrite_doors([{'row': -1, 'col': 4, 'size': 2, 'direction': 'V'},
+                      {'row': 2, 'col': 3, 'size': 5, 'direction': 'H'},
+                      {'row': 9, 'col': 0, 'size': 2, 'direction': 'H'}])
+    assert sm.exits == [(0, 4), (2, 3), (2, 4)]
+
+
+def test_expand_grouped_doors():
+    from interface.services.simulator_integration import _expand_grouped_doors
+    rows, cols = _expand_grouped_doors([{'row': 1, 'col': 0, 'size': 2, 'direction': 'V'},
+                                        {'row': 0, 'col': 4, 'size': 0, 'direction': 'H'},
+                                        {'row': 3, 'col': 1, 'size': 3, 'direction': 'H'}])
+    assert list(zip(rows.tolist(), cols.tolist())) == [(1, 0), (2, 0), (3, 1), (3, 2), (3, 3)]
+    assert [a.size for a in _expand_grouped_doors([])] == [0, 0]
+
+
+def test_run_many_uses_workers_in_order(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from interface.services import simulator_integration as si
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    calls = []
+
+    class FakeSim:
+        @staticmethod
+        def run(name, draw, scenario_seed, simulation_seed):
+            calls.append(name)
+            if name == 'bad':
+                raise RuntimeError('boom')
+            return len(name), 1.5
+
+    old = si._worker_simulator
+    si._worker_simulator = FakeSim
+    sim._workers = ThreadPoolExecutor(max_workers=2)
+    try:
+        runs = sim.run_many(['exp_a', 'bad', 'exp_ccc'], scenario_seed=1, simulation_seed=2)
+    finally:
+        sim.stop_workers()
+        si._worker_simulator = old
+    assert [p.returncode for p in runs] == [0, 1, 0]
+    assert 'qtd iteracoes 7' in runs[2].stdout and 'boom' in runs[1].stderr
+    assert sorted(calls) == ['bad', 'exp_a', 'exp_ccc']
+
+
+def test_read_results_classifies_outputs(tmp_path):
+    sim = SimulatorIntegration(base_path=str(tmp_path))
+    out_dir = Path(sim.output_path) / 'exp_frames'
+    out_dir.mkdir(parents=True)
+    for name in ('frame_10.png', 'frame_02.png', 'report.html', 'metrics.json', 'log.txt', 'simulator.log'):
+        (out_dir / name).write_text('x')
+    (out_dir / 'sub.png').mkdir()
+    res = sim.read_results('exp_frames')
+    assert [p.name for p in res['frames']] == ['frame_02.png', 'frame_10.png']
+    assert res['report'].name == 'report.html'
+    assert [p.name for p in res['metrics']] == ['metrics.json', 'log.txt']
+
+
+def test_simulator_run_reseeds_every_call(monkeypatch):
+    # persistent workers call run() repeatedly in one process
+    import random
+    from simulador_heuristica.simulator import main as simulator_main
+    drawn = []
+
+    class Stop(Exception):
+        pass
+
+    class FirstDraw:
+        def __init__(self, *args):
+            drawn.append(random.random())
+
+        def load_map(self):
+            raise Stop
+
+    monkeypatch.setattr(simulator_main, 'StructureMap', FirstDraw)
+    for seed in (0, None):
+        random.seed(123)
+        with pytest.raises(Stop):
+            simulator_main.run('exp', scenario_seed=seed)
+    assert drawn[0] == random.Random(0).random()
+    # no seed: fresh entropy, not the stream left behind by the previous run
+    assert drawn[1] != random.Random(123).random()
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_json_utils_dumps_keeps_non_ascii(monkeypatch, use_orjson):
+    from interface.services import json_utils
+    if use_orjson and json_utils.orjson is None:
+        pytest.skip('orjson not installed')
+    if not use_orjson:
+        monkeypatch.setattr(json_utils, 'orjson', None)
+    data = json_utils.dumps({'rótulo': 'saída'}, indent=True)
+    assert 'saída'.encode('utf-8') in data and b'\\u' not in data
+    assert json_utils.loads(data) == {'rótulo': 'saída'}